@@ -73,6 +73,12 @@ class Database:
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         self._connection = await aiosqlite.connect(self.db_path)
         self._connection.row_factory = aiosqlite.Row
+        # WAL lets readers proceed alongside the writer and turns each commit into
+        # an append to the log; with synchronous=NORMAL, commits no longer fsync
+        # (WAL stays crash-consistent, only the last commits may roll back on power loss)
+        await self._connection.execute("PRAGMA journal_mode=WAL")
+        await self._connection.execute("PRAGMA synchronous=NORMAL")
+        await self._connection.execute("PRAGMA busy_timeout=5000")
         await self._connection.executescript(SCHEMA)
         await self._connection.commit()
         logger.debug("Database schema initialized")
@@ -6,8 +6,11 @@ Based on https://github.com/michaelhart/meshcore-decoder
 import hmac
 import hashlib
 import logging
+from collections.abc import Iterable
 from dataclasses import dataclass
 from enum import IntEnum
+from functools import lru_cache
+from typing import Any
 
 from Crypto.Cipher import AES
 
@@ -37,6 +40,24 @@ class RouteType(IntEnum):
     TRANSPORT_DIRECT = 0x03
 
 
+# Header field lookups by raw value, so parsing doesn't construct enums per packet.
+# Unassigned payload types map to None.
+_ROUTE_TYPES: tuple[RouteType, ...] = tuple(RouteType(v) for v in range(4))
+_PAYLOAD_TYPES: tuple[PayloadType | None, ...] = tuple(
+    PayloadType(v) if v in PayloadType._value2member_map_ else None for v in range(16)
+)
+
+# Enum members checked on every packet, bound at module level so hot paths compare by
+# identity (parse_packet only ever returns these singletons) instead of looking them up
+_GROUP_TEXT = PayloadType.GROUP_TEXT
+_ADVERT = PayloadType.ADVERT
+_TRANSPORT_ROUTES = (RouteType.TRANSPORT_FLOOD, RouteType.TRANSPORT_DIRECT)
+
+
+# Characters that mean the text before ": " isn't a sender name
+_INVALID_SENDER_CHARS = frozenset(":[]\x00")
+
+
 @dataclass
 class DecryptedGroupText:
     """Result of decrypting a GroupText (channel) message."""
@@ -48,6 +69,16 @@ class DecryptedGroupText:
     channel_hash: str
 
 
+@dataclass(frozen=True)
+class PreparedChannelKey:
+    """Per-key material computed once and reused for every packet tried against the key."""
+
+    key: bytes
+    channel_hash: int  # First byte of SHA256(key)
+    mac: hmac.HMAC  # HMAC-SHA256 keyed with key + 16 zero bytes; copy() before use
+    cipher: Any  # AES-128 ECB cipher; ECB keeps no state between calls, so it's reused as-is
+
+
 @dataclass
 class ParsedAdvertisement:
     """Result of parsing an advertisement packet."""
@@ -69,13 +100,69 @@ class PacketInfo:
     payload: bytes
 
 
+@lru_cache(maxsize=256)
+def channel_hash_byte(channel_key: bytes) -> int:
+    """
+    Return the channel hash for a 16-byte channel key as an int.
+    This is the first byte of SHA256(key).
+
+    Cached because the same handful of keys are checked against every packet.
+    """
+    return hashlib.sha256(channel_key).digest()[0]
+
+
 def calculate_channel_hash(channel_key: bytes) -> str:
     """
     Calculate the channel hash from a 16-byte channel key.
     Returns the first byte of SHA256(key) as hex.
     """
-    hash_bytes = hashlib.sha256(channel_key).digest()
-    return format(hash_bytes[0], "02x")
+    return format(channel_hash_byte(channel_key), "02x")
+
+
+def derive_channel_key(channel_name: str) -> bytes:
+    """Derive a hashtag channel's 16-byte key from its name: SHA256(name)[:16]."""
+    return hashlib.sha256(channel_name.encode("utf-8")).digest()[:16]
+
+
+@lru_cache(maxsize=256)
+def prepare_channel_key(channel_key: bytes) -> PreparedChannelKey:
+    """
+    Precompute the channel hash, keyed HMAC state and AES key schedule for a 16-byte channel key.
+
+    Cached so the realtime path, which tries every stored channel key against each
+    incoming GroupText, doesn't rebuild the HMAC and AES key schedules per key per packet.
+    """
+    return PreparedChannelKey(
+        key=channel_key,
+        channel_hash=channel_hash_byte(channel_key),
+        mac=hmac.new(channel_key + bytes(16), digestmod=hashlib.sha256),
+        cipher=AES.new(channel_key, AES.MODE_ECB),
+    )
+
+
+def _header_types(header: int) -> tuple[RouteType, PayloadType | None]:
+    """Route and payload type from a header byte; payload type is None if unassigned."""
+    return _ROUTE_TYPES[header & 0x03], _PAYLOAD_TYPES[(header >> 2) & 0x0F]
+
+
+def _payload_layout(raw_packet: bytes, route_type: RouteType) -> tuple[int, int] | None:
+    """
+    Locate the payload of a raw packet (at least 1 byte long) with the given route type.
+    Returns (path_length, payload offset), or None if the packet is truncated.
+    """
+    # Skip transport codes if present
+    offset = 5 if route_type in _TRANSPORT_ROUTES else 1
+
+    # Get path length
+    if len(raw_packet) < offset + 1:
+        return None
+    path_length = raw_packet[offset]
+    offset += 1
+
+    # Skip path data
+    if len(raw_packet) < offset + path_length:
+        return None
+    return path_length, offset + path_length
 
 
 def extract_payload(raw_packet: bytes) -> bytes | None:
@@ -94,83 +181,55 @@ def extract_payload(raw_packet: bytes) -> bytes | None:
     if len(raw_packet) < 2:
         return None
 
-    try:
-        header = raw_packet[0]
-        route_type = header & 0x03
-        offset = 1
-
-        # Skip transport codes if present (TRANSPORT_FLOOD=0, TRANSPORT_DIRECT=3)
-        if route_type in (0x00, 0x03):
-            if len(raw_packet) < offset + 4:
-                return None
-            offset += 4
-
-        # Get path length
-        if len(raw_packet) < offset + 1:
-            return None
-        path_length = raw_packet[offset]
-        offset += 1
-
-        # Skip path data
-        if len(raw_packet) < offset + path_length:
-            return None
-        offset += path_length
-
-        # Rest is payload
-        return raw_packet[offset:]
-    except (ValueError, IndexError):
+    route_type, _ = _header_types(raw_packet[0])
+    layout = _payload_layout(raw_packet, route_type)
+    if layout is None:
         return None
 
+    # Rest is payload
+    return raw_packet[layout[1]:]
+
 
 def parse_packet(raw_packet: bytes) -> PacketInfo | None:
     """Parse a raw packet and extract basic info."""
     if len(raw_packet) < 2:
         return None
 
-    try:
-        header = raw_packet[0]
-        route_type = RouteType(header & 0x03)
-        payload_type = PayloadType((header >> 2) & 0x0F)
-        payload_version = (header >> 6) & 0x03
-
-        offset = 1
-
-        # Skip transport codes if present
-        if route_type in (RouteType.TRANSPORT_FLOOD, RouteType.TRANSPORT_DIRECT):
-            if len(raw_packet) < offset + 4:
-                return None
-            offset += 4
-
-        # Get path length
-        if len(raw_packet) < offset + 1:
-            return None
-        path_length = raw_packet[offset]
-        offset += 1
-
-        # Skip path data
-        if len(raw_packet) < offset + path_length:
-            return None
-        offset += path_length
-
-        # Rest is payload
-        payload = raw_packet[offset:]
-
-        return PacketInfo(
-            route_type=route_type,
-            payload_type=payload_type,
-            payload_version=payload_version,
-            path_length=path_length,
-            payload=payload,
-        )
-    except (ValueError, IndexError):
+    header = raw_packet[0]
+    route_type, payload_type = _header_types(header)
+    if payload_type is None:
+        return None
+    payload_version = (header >> 6) & 0x03
+
+    layout = _payload_layout(raw_packet, route_type)
+    if layout is None:
         return None
+    path_length, offset = layout
+
+    # Rest is payload
+    payload = raw_packet[offset:]
+
+    return PacketInfo(
+        route_type=route_type,
+        payload_type=payload_type,
+        payload_version=payload_version,
+        path_length=path_length,
+        payload=payload,
+    )
 
 
 def decrypt_group_text(
     payload: bytes, channel_key: bytes
+) -> DecryptedGroupText | None:
+    """Decrypt a GroupText payload using the channel key."""
+    return decrypt_group_text_prepared(payload, prepare_channel_key(channel_key))
+
+
+def decrypt_group_text_prepared(
+    payload: bytes, prepared: PreparedChannelKey
 ) -> DecryptedGroupText | None:
     """
-    Decrypt a GroupText payload using the channel key.
+    Decrypt a GroupText payload using a prepared channel key.
 
     GroupText structure:
     - channel_hash (1 byte): First byte of SHA256 of channel key
@@ -193,18 +252,15 @@ def decrypt_group_text(
         # AES requires 16-byte blocks
         return None
 
-    # Create the 32-byte channel secret (key + 16 zero bytes)
-    channel_secret = channel_key + bytes(16)
-
-    # Verify MAC: HMAC-SHA256 of ciphertext using full 32-byte secret
-    calculated_mac = hmac.new(channel_secret, ciphertext, hashlib.sha256).digest()
-    if calculated_mac[:2] != cipher_mac:
+    # Verify MAC: HMAC-SHA256 of ciphertext using the 32-byte secret (key + 16 zero bytes)
+    mac = prepared.mac.copy()
+    mac.update(ciphertext)
+    if not hmac.compare_digest(mac.digest()[:2], cipher_mac):
         return None
 
     # Decrypt using AES-128 ECB with the 16-byte key
     try:
-        cipher = AES.new(channel_key, AES.MODE_ECB)
-        decrypted = cipher.decrypt(ciphertext)
+        decrypted = prepared.cipher.decrypt(ciphertext)
     except Exception as e:
         logger.debug("AES decryption failed: %s", e)
         return None
@@ -216,27 +272,24 @@ def decrypt_group_text(
     timestamp = int.from_bytes(decrypted[0:4], "little")
     flags = decrypted[4]
 
-    # Extract message text (UTF-8, null-terminated)
-    message_bytes = decrypted[5:]
+    # Extract message text (UTF-8, null-terminated). Find the terminator in the bytes
+    # so only the text itself is sliced and decoded, not the zero padding after it
+    null_idx = decrypted.find(0, 5)
+    if null_idx < 0:
+        null_idx = len(decrypted)
     try:
-        message_text = message_bytes.decode("utf-8")
-        # Remove null terminator and any padding
-        null_idx = message_text.find("\x00")
-        if null_idx >= 0:
-            message_text = message_text[:null_idx]
+        message_text = decrypted[5:null_idx].decode("utf-8")
     except UnicodeDecodeError:
         return None
 
     # Parse "sender: message" format
     sender = None
     content = message_text
-    colon_idx = message_text.find(": ")
-    if 0 < colon_idx < 50:
-        potential_sender = message_text[:colon_idx]
-        # Check for invalid characters in sender name
-        if not any(c in potential_sender for c in ":[]\x00"):
-            sender = potential_sender
-            content = message_text[colon_idx + 2 :]
+    potential_sender, separator, rest = message_text.partition(": ")
+    # Check for invalid characters in sender name
+    if separator and 0 < len(potential_sender) < 50 and _INVALID_SENDER_CHARS.isdisjoint(potential_sender):
+        sender = potential_sender
+        content = rest
 
     return DecryptedGroupText(
         timestamp=timestamp,
@@ -254,36 +307,105 @@ def try_decrypt_packet_with_channel_key(
     Try to decrypt a raw packet using a channel key.
     Returns decrypted content if successful, None otherwise.
     """
+    return try_decrypt_packet_with_channel_key_prepared(raw_packet, prepare_channel_key(channel_key))
+
+
+def try_decrypt_packet_with_channel_key_prepared(
+    raw_packet: bytes, prepared: PreparedChannelKey
+) -> DecryptedGroupText | None:
+    """Like try_decrypt_packet_with_channel_key, for a key prepared once with prepare_channel_key."""
     packet_info = parse_packet(raw_packet)
     if packet_info is None:
         return None
 
     # Only GroupText packets can be decrypted with channel keys
-    if packet_info.payload_type != PayloadType.GROUP_TEXT:
+    if packet_info.payload_type is not _GROUP_TEXT:
         return None
 
     # Check if channel hash matches
     if len(packet_info.payload) < 1:
         return None
 
-    packet_channel_hash = format(packet_info.payload[0], "02x")
-    expected_hash = calculate_channel_hash(channel_key)
+    # Compare the raw byte; only ~1/256 of packets get past this to the HMAC check
+    if packet_info.payload[0] != prepared.channel_hash:
+        return None
+
+    return decrypt_group_text_prepared(packet_info.payload, prepared)
+
+
+def build_channel_key_index(channel_keys: Iterable[bytes]) -> dict[int, list[PreparedChannelKey]]:
+    """
+    Group channel keys by their channel hash byte.
+
+    A packet's first payload byte then selects the (usually zero or one) keys
+    worth trying, instead of checking every key in turn.
+    """
+    index: dict[int, list[PreparedChannelKey]] = {}
+    for channel_key in channel_keys:
+        prepared = prepare_channel_key(channel_key)
+        index.setdefault(prepared.channel_hash, []).append(prepared)
+    return index
+
 
-    if packet_channel_hash != expected_hash:
+def try_decrypt_packet_with_channel_index(
+    raw_packet: bytes, index: dict[int, list[PreparedChannelKey]]
+) -> tuple[PreparedChannelKey, DecryptedGroupText] | None:
+    """
+    Try to decrypt a raw packet against every key in a build_channel_key_index() index.
+    The packet is parsed once. Returns the matching key and decrypted content, or None.
+    """
+    packet_info = parse_packet(raw_packet)
+    if packet_info is None or packet_info.payload_type is not _GROUP_TEXT:
         return None
 
-    return decrypt_group_text(packet_info.payload, channel_key)
+    if len(packet_info.payload) < 1:
+        return None
+
+    for prepared in index.get(packet_info.payload[0], ()):
+        decrypted = decrypt_group_text_prepared(packet_info.payload, prepared)
+        if decrypted:
+            return prepared, decrypted
+
+    return None
+
+
+def try_decrypt_packets_with_channel_key(
+    raw_packets: list[bytes], channel_key: bytes
+) -> list[DecryptedGroupText | None]:
+    """
+    Try to decrypt a batch of raw packets with one channel key.
+    Returns one result per packet, in order. Pure CPU work, safe to run off the event loop.
+    """
+    # Prepared here rather than by the caller: HMAC state can't be pickled to a worker
+    prepared = prepare_channel_key(channel_key)
+    # Nearly every packet is another channel's or not GroupText at all; reject those on the
+    # header and hash byte alone before building a PacketInfo and copying the payload
+    return [
+        try_decrypt_packet_with_channel_key_prepared(raw, prepared)
+        if _group_text_hash_byte(raw) == prepared.channel_hash
+        else None
+        for raw in raw_packets
+    ]
+
+
+def _group_text_hash_byte(raw_packet: bytes) -> int | None:
+    """Channel hash byte of a GroupText packet, read in place; None for other or truncated packets."""
+    if len(raw_packet) < 2:
+        return None
+    route_type, payload_type = _header_types(raw_packet[0])
+    if payload_type is not _GROUP_TEXT:
+        return None
+    layout = _payload_layout(raw_packet, route_type)
+    if layout is None or len(raw_packet) <= layout[1]:
+        return None
+    return raw_packet[layout[1]]
 
 
 def get_packet_payload_type(raw_packet: bytes) -> PayloadType | None:
     """Get the payload type of a raw packet without full parsing."""
     if len(raw_packet) < 1:
         return None
-    header = raw_packet[0]
-    try:
-        return PayloadType((header >> 2) & 0x0F)
-    except ValueError:
-        return None
+    return _header_types(raw_packet[0])[1]
 
 
 def parse_advertisement(payload: bytes) -> ParsedAdvertisement | None:
@@ -323,21 +445,26 @@ def parse_advertisement(payload: bytes) -> ParsedAdvertisement | None:
     # Names are typically at the end after any binary data
     try:
         # Find the last valid UTF-8 string
-        for start in range(len(advert_data)):
+        start = 0
+        while start < len(advert_data):
             try:
                 text = advert_data[start:].decode("utf-8")
-                # Filter out control characters and check if it looks like a name
-                null_idx = text.find("\x00")
-                if null_idx >= 0:
-                    text = text[:null_idx]
-                text = text.strip()
-                if text and len(text) >= 1 and len(text) <= 40:
-                    # Check if it contains printable characters
-                    if any(c.isalnum() for c in text):
-                        name = text
-                        break
-            except UnicodeDecodeError:
+            except UnicodeDecodeError as e:
+                # UTF-8 is self-synchronizing: every later start up to and including the
+                # failing byte hits the same error, so resume just past it
+                start += e.start + 1
                 continue
+            # Filter out control characters and check if it looks like a name
+            null_idx = text.find("\x00")
+            if null_idx >= 0:
+                text = text[:null_idx]
+            text = text.strip()
+            if text and len(text) >= 1 and len(text) <= 40:
+                # Check if it contains printable characters
+                if any(c.isalnum() for c in text):
+                    name = text
+                    break
+            start += 1
     except Exception:
         pass
 
@@ -358,7 +485,7 @@ def try_parse_advertisement(raw_packet: bytes) -> ParsedAdvertisement | None:
     if packet_info is None:
         return None
 
-    if packet_info.payload_type != PayloadType.ADVERT:
+    if packet_info.payload_type is not _ADVERT:
         return None
 
     return parse_advertisement(packet_info.payload)
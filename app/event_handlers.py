@@ -1,6 +1,7 @@
+import heapq
 import logging
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
 from meshcore import EventType
 
@@ -15,26 +16,40 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-# Track pending ACKs: expected_ack_code -> (message_id, timestamp, timeout_ms)
-_pending_acks: dict[str, tuple[int, float, int]] = {}
+class PendingAck(NamedTuple):
+    """A direct message waiting for its ACK."""
+
+    message_id: int
+    created_at: int  # time.monotonic_ns() when tracked, so wall-clock steps don't affect expiry
+    timeout_ms: int
+
+
+# Track pending ACKs: expected_ack_code -> PendingAck
+_pending_acks: dict[str, PendingAck] = {}
+
+# Min-heap of (expires_at_ns, ack_code, tracked_at_ns) so cleanup only touches ACKs that are due.
+# Entries for codes that were acked or re-tracked since are skipped when popped.
+_ack_expiry_heap: list[tuple[int, str, int]] = []
 
 
 def track_pending_ack(expected_ack: str, message_id: int, timeout_ms: int) -> None:
     """Track a pending ACK for a direct message."""
-    _pending_acks[expected_ack] = (message_id, time.time(), timeout_ms)
+    created_at = time.monotonic_ns()
+    _pending_acks[expected_ack] = PendingAck(message_id, created_at, timeout_ms)
+    # 2x timeout as buffer
+    heapq.heappush(_ack_expiry_heap, (created_at + timeout_ms * 2_000_000, expected_ack, created_at))
     logger.debug("Tracking pending ACK %s for message %d (timeout %dms)", expected_ack, message_id, timeout_ms)
 
 
 def _cleanup_expired_acks() -> None:
     """Remove expired pending ACKs."""
-    now = time.time()
-    expired = []
-    for code, (msg_id, created_at, timeout_ms) in _pending_acks.items():
-        if now - created_at > (timeout_ms / 1000) * 2:  # 2x timeout as buffer
-            expired.append(code)
-    for code in expired:
-        del _pending_acks[code]
-        logger.debug("Expired pending ACK %s", code)
+    now = time.monotonic_ns()
+    while _ack_expiry_heap and _ack_expiry_heap[0][0] < now:
+        _, code, created_at = heapq.heappop(_ack_expiry_heap)
+        pending = _pending_acks.get(code)
+        if pending is not None and pending.created_at == created_at:
+            del _pending_acks[code]
+            logger.debug("Expired pending ACK %s", code)
 
 
 async def on_contact_message(event: "Event") -> None:
@@ -177,7 +192,7 @@ async def on_ack(event: "Event") -> None:
     _cleanup_expired_acks()
 
     if ack_code in _pending_acks:
-        message_id, _, _ = _pending_acks.pop(ack_code)
+        message_id = _pending_acks.pop(ack_code).message_id
         logger.info("ACK received for message %d", message_id)
 
         ack_count = await MessageRepository.increment_ack_count(message_id)
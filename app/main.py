@@ -1,7 +1,9 @@
 import logging
+import ssl
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+from Crypto.Cipher import AES
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
@@ -20,6 +22,8 @@ from app.radio_sync import (
     sync_and_offload_all,
 )
 from app.routers import channels, contacts, health, messages, packets, radio, settings, ws
+from app.routers.packets import cancel_historical_decryption, shutdown_decrypt_pool
+from app.websocket import start_broadcast_worker, stop_broadcast_worker
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -30,6 +34,15 @@ async def lifespan(app: FastAPI):
     """Manage database and radio connection lifecycle."""
     await db.connect()
     logger.info("Database connected")
+    start_broadcast_worker()
+    # hashlib's SHA-256 (channel keys/hashes, HMAC) comes from this OpenSSL build,
+    # which uses SHA-NI on CPUs that have it. PyCryptodome picks its AES-NI
+    # implementation at import time when the CPU supports it.
+    logger.debug(
+        "Crypto backend: %s, AES-NI: %s",
+        ssl.OPENSSL_VERSION,
+        getattr(AES, "_raw_aesni_lib", None) is not None,
+    )
 
     try:
         await radio_manager.connect()
@@ -72,9 +85,12 @@ async def lifespan(app: FastAPI):
     await radio_manager.stop_connection_monitor()
     stop_message_polling()
     stop_periodic_sync()
+    await cancel_historical_decryption()
+    shutdown_decrypt_pool()
     if radio_manager.meshcore:
         await radio_manager.meshcore.stop_auto_message_fetching()
     await radio_manager.disconnect()
+    await stop_broadcast_worker()
     await db.disconnect()
 
 
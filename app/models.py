@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class Contact(BaseModel):
@@ -145,28 +145,44 @@ class AclEntry(BaseModel):
 
 
 class TelemetryResponse(BaseModel):
-    """Telemetry data from a repeater, formatted for human readability."""
-    pubkey_prefix: str = Field(description="12-char public key prefix")
-    battery_volts: float = Field(description="Battery voltage in volts")
-    tx_queue_len: int = Field(description="Transmit queue length")
-    noise_floor_dbm: int = Field(description="Noise floor in dBm")
-    last_rssi_dbm: int = Field(description="Last RSSI in dBm")
-    last_snr_db: float = Field(description="Last SNR in dB")
-    packets_received: int = Field(description="Total packets received")
-    packets_sent: int = Field(description="Total packets sent")
-    airtime_seconds: int = Field(description="TX airtime in seconds")
-    rx_airtime_seconds: int = Field(description="RX airtime in seconds")
-    uptime_seconds: int = Field(description="Uptime in seconds")
-    sent_flood: int = Field(description="Flood packets sent")
-    sent_direct: int = Field(description="Direct packets sent")
-    recv_flood: int = Field(description="Flood packets received")
-    recv_direct: int = Field(description="Direct packets received")
-    flood_dups: int = Field(description="Duplicate flood packets")
-    direct_dups: int = Field(description="Duplicate direct packets")
-    full_events: int = Field(description="Full event queue count")
+    """Telemetry data from a repeater, formatted for human readability.
+
+    Validates directly from the radio's status dict: validation aliases map the
+    radio's field names (nb_recv, full_evts, ...) onto ours, and missing fields
+    default to zero. Field names are accepted too, so serialized responses
+    round-trip.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    pubkey_prefix: str = Field(validation_alias="pubkey_pre", description="12-char public key prefix")
+    battery_volts: float = Field(default=0.0, description="Battery voltage in volts")
+    tx_queue_len: int = Field(default=0, description="Transmit queue length")
+    noise_floor_dbm: int = Field(default=0, validation_alias="noise_floor", description="Noise floor in dBm")
+    last_rssi_dbm: int = Field(default=0, validation_alias="last_rssi", description="Last RSSI in dBm")
+    last_snr_db: float = Field(default=0.0, validation_alias="last_snr", description="Last SNR in dB")
+    packets_received: int = Field(default=0, validation_alias="nb_recv", description="Total packets received")
+    packets_sent: int = Field(default=0, validation_alias="nb_sent", description="Total packets sent")
+    airtime_seconds: int = Field(default=0, validation_alias="airtime", description="TX airtime in seconds")
+    rx_airtime_seconds: int = Field(default=0, validation_alias="rx_airtime", description="RX airtime in seconds")
+    uptime_seconds: int = Field(default=0, validation_alias="uptime", description="Uptime in seconds")
+    sent_flood: int = Field(default=0, description="Flood packets sent")
+    sent_direct: int = Field(default=0, description="Direct packets sent")
+    recv_flood: int = Field(default=0, description="Flood packets received")
+    recv_direct: int = Field(default=0, description="Direct packets received")
+    flood_dups: int = Field(default=0, description="Duplicate flood packets")
+    direct_dups: int = Field(default=0, description="Duplicate direct packets")
+    full_events: int = Field(default=0, validation_alias="full_evts", description="Full event queue count")
     neighbors: list[NeighborInfo] = Field(default_factory=list, description="List of neighbors seen by repeater")
     acl: list[AclEntry] = Field(default_factory=list, description="Access control list")
 
+    @model_validator(mode="before")
+    @classmethod
+    def _battery_mv_to_volts(cls, data):
+        # The radio reports battery in mV (e.g., 3775 -> 3.775 V)
+        if isinstance(data, dict) and "bat" in data:
+            data = {**data, "battery_volts": data["bat"] / 1000.0}
+        return data
+
 
 class CommandRequest(BaseModel):
     """Request to send a CLI command to a repeater."""
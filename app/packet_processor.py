@@ -17,103 +17,163 @@ import logging
 import time
 
 from app.decoder import (
+    DecryptedGroupText,
     PayloadType,
+    PreparedChannelKey,
+    build_channel_key_index,
     parse_packet,
-    try_decrypt_packet_with_channel_key,
+    try_decrypt_packet_with_channel_index,
     try_parse_advertisement,
 )
-from app.models import CONTACT_TYPE_REPEATER, RawPacketBroadcast, RawPacketDecryptedInfo
+from app.models import CONTACT_TYPE_REPEATER, Channel, RawPacketBroadcast, RawPacketDecryptedInfo
 from app.repository import ChannelRepository, ContactRepository, MessageRepository, RawPacketRepository
-from app.websocket import broadcast_event
+from app.snapshots import snapshot_version
+from app.websocket import broadcast_event, ws_manager
 
 logger = logging.getLogger(__name__)
 
 
 # Pending repeats for outgoing message ACK detection
 # Key: (channel_key, text_hash, timestamp) -> message_id
-_pending_repeats: dict[tuple[str, str, int], int] = {}
-_pending_repeat_expiry: dict[tuple[str, str, int], float] = {}
+_pending_repeats: dict[tuple[str, int, int], int] = {}
+_pending_repeat_expiry: dict[tuple[str, int, int], float] = {}
 REPEAT_EXPIRY_SECONDS = 30
 
+# Channel key index for realtime GroupText decryption, tagged with the channels
+# snapshot version it was built from so any channel change rebuilds it
+_channel_index: tuple[int, dict[bytes, Channel], dict[int, list[PreparedChannelKey]]] | None = None
 
-async def create_message_from_decrypted(
-    packet_id: int,
-    channel_key: str,
-    sender: str | None,
-    message_text: str,
-    timestamp: int,
-    received_at: int | None = None,
-) -> int | None:
-    """Create a message record from decrypted channel packet content.
-
-    This is the shared logic for storing decrypted channel messages,
-    used by both real-time packet processing and historical decryption.
-
-    Returns the message ID if created, None if duplicate.
-    """
-    import time as time_module
-    received = received_at or int(time_module.time())
-
-    # Format the message text
-    text = f"{sender}: {message_text}" if sender else message_text
-
-    # Try to create message - INSERT OR IGNORE handles duplicates atomically
-    msg_id = await MessageRepository.create(
-        msg_type="CHAN",
-        text=text,
-        conversation_key=channel_key.upper(),
-        sender_timestamp=timestamp,
-        received_at=received,
-    )
 
-    if msg_id is None:
-        # Duplicate detected - find existing message ID for packet linkage
-        existing_id = await MessageRepository.find_duplicate(
-            conversation_key=channel_key.upper(),
-            text=text,
-            sender_timestamp=timestamp,
-        )
-        if existing_id:
-            await RawPacketRepository.mark_decrypted(packet_id, existing_id)
-        return None
+def _channel_message_text(sender: str | None, message: str) -> str:
+    """Stored text for a decrypted channel message: "sender: message", or just the message."""
+    return f"{sender}: {message}" if sender else message
 
-    # Mark the raw packet as decrypted
-    await RawPacketRepository.mark_decrypted(packet_id, msg_id)
 
-    # Broadcast new message to connected clients (for historical decryption visibility)
+def _broadcast_channel_message(
+    msg_id: int,
+    conversation_key: str,
+    text: str,
+    sender_timestamp: int,
+    received_at: int,
+    path_len: int | None = None,
+) -> None:
+    """Broadcast a newly stored incoming channel message to connected clients."""
     broadcast_event("message", {
         "id": msg_id,
         "type": "CHAN",
-        "conversation_key": channel_key.upper(),
+        "conversation_key": conversation_key,
         "text": text,
-        "sender_timestamp": timestamp,
-        "received_at": received,
-        "path_len": None,
+        "sender_timestamp": sender_timestamp,
+        "received_at": received_at,
+        "path_len": path_len,
         "txt_type": 0,
         "signature": None,
         "outgoing": False,
         "acked": 0,
     })
 
-    return msg_id
+
+async def create_messages_from_decrypted(
+    channel_key: str,
+    decrypted: list[tuple[int, DecryptedGroupText, int]],
+) -> int:
+    """Store channel messages decrypted by historical decryption.
+
+    Takes (packet_id, decrypted, received_at) tuples and stores them with one
+    commit for the messages and one for the packet links, instead of two per packet.
+
+    Returns the number of new messages created.
+    """
+    conversation_key = channel_key.upper()
+    rows = [
+        {
+            "msg_type": "CHAN",
+            "text": _channel_message_text(result.sender, result.message),
+            "conversation_key": conversation_key,
+            "sender_timestamp": result.timestamp,
+            "received_at": received_at,
+        }
+        for _, result, received_at in decrypted
+    ]
+
+    msg_ids = await MessageRepository.create_many(rows)
+
+    links: list[tuple[int, int]] = []
+    for (packet_id, _, _), row, msg_id in zip(decrypted, rows, msg_ids):
+        if msg_id is None:
+            # Duplicate - link the packet to the existing message
+            existing_id = await MessageRepository.find_duplicate(
+                conversation_key=conversation_key,
+                text=row["text"],
+                sender_timestamp=row["sender_timestamp"],
+            )
+            if existing_id:
+                links.append((packet_id, existing_id))
+            continue
+
+        links.append((packet_id, msg_id))
+        _broadcast_channel_message(
+            msg_id, conversation_key, row["text"], row["sender_timestamp"], row["received_at"]
+        )
+
+    if links:
+        await RawPacketRepository.mark_many_decrypted(links)
+
+    return sum(1 for msg_id in msg_ids if msg_id is not None)
+
+
+async def _get_channel_index() -> tuple[dict[bytes, Channel], dict[int, list[PreparedChannelKey]]]:
+    """Get the stored channels by key bytes and their hash-byte index, reloading after changes."""
+    global _channel_index
+    version = snapshot_version("channels")
+    if _channel_index is None or _channel_index[0] != version:
+        channels_by_key = {}
+        for channel in await ChannelRepository.get_all():
+            try:
+                channels_by_key[bytes.fromhex(channel.key)] = channel
+            except ValueError:
+                continue
+        # Tagged with the version from before the load, so a change mid-load rebuilds next time
+        _channel_index = (version, channels_by_key, build_channel_key_index(channels_by_key))
+    return _channel_index[1], _channel_index[2]
+
+
+def _text_hash(text: str) -> int:
+    """Hash message text for the pending-repeat key.
+
+    The builtin str hash is cached on the string and is fine here: pending repeats only
+    live in this process's memory for REPEAT_EXPIRY_SECONDS, so it needn't be stable
+    across processes. Tracking and detection must both go through this function.
+    """
+    return hash(text)
 
 
 def track_pending_repeat(channel_key: str, text: str, timestamp: int, message_id: int) -> None:
     """Track an outgoing channel message for repeat detection."""
-    text_hash = str(hash(text))
+    text_hash = _text_hash(text)
     key = (channel_key.upper(), text_hash, timestamp)
     _pending_repeats[key] = message_id
+    # Re-insert so _pending_repeat_expiry stays ordered by expiry time
+    _pending_repeat_expiry.pop(key, None)
     _pending_repeat_expiry[key] = time.time() + REPEAT_EXPIRY_SECONDS
     logger.debug("Tracking repeat for channel %s, message %d", channel_key[:8], message_id)
 
 
 def _cleanup_expired_repeats() -> None:
-    """Remove expired pending repeats."""
+    """Remove expired pending repeats.
+
+    Every repeat gets the same expiry window, so _pending_repeat_expiry is in expiry
+    order and cleanup stops at the first entry that hasn't expired.
+    """
     now = time.time()
-    expired = [k for k, exp in _pending_repeat_expiry.items() if exp < now]
+    expired = []
+    for k, exp in _pending_repeat_expiry.items():
+        if exp >= now:
+            break
+        expired.append(k)
     for k in expired:
         _pending_repeats.pop(k, None)
-        _pending_repeat_expiry.pop(k, None)
+        del _pending_repeat_expiry[k]
 
 
 async def process_raw_packet(
@@ -183,21 +243,22 @@ async def process_raw_packet(
     #     if decrypt_result:
     #         result.update(decrypt_result)
 
-    # Broadcast raw packet for the packet feed UI
-    broadcast_payload = RawPacketBroadcast(
-        id=packet_id,
-        timestamp=ts,
-        data=raw_hex,
-        payload_type=payload_type_name,
-        snr=snr,
-        rssi=rssi,
-        decrypted=result["decrypted"],
-        decrypted_info=RawPacketDecryptedInfo(
-            channel_name=result["channel_name"],
-            sender=result["sender"],
-        ) if result["decrypted"] else None,
-    )
-    broadcast_event("raw_packet", broadcast_payload.model_dump())
+    # Broadcast raw packet for the packet feed UI (skip building it with no one listening)
+    if ws_manager.has_clients:
+        broadcast_payload = RawPacketBroadcast(
+            id=packet_id,
+            timestamp=ts,
+            data=raw_hex,
+            payload_type=payload_type_name,
+            snr=snr,
+            rssi=rssi,
+            decrypted=result["decrypted"],
+            decrypted_info=RawPacketDecryptedInfo(
+                channel_name=result["channel_name"],
+                sender=result["sender"],
+            ) if result["decrypted"] else None,
+        )
+        broadcast_event("raw_packet", broadcast_payload.model_dump())
 
     return result
 
@@ -215,118 +276,104 @@ async def _process_group_text(
     Creates a message entry if successful.
     Handles repeat detection for outgoing message ACKs.
     """
-    # Try to decrypt with all known channel keys
-    channels = await ChannelRepository.get_all()
-
-    for channel in channels:
-        # Convert hex key to bytes for decryption
-        try:
-            channel_key_bytes = bytes.fromhex(channel.key)
-        except ValueError:
-            continue
+    # Try to decrypt with all known channel keys, looked up by the packet's channel hash
+    channels_by_key, index = await _get_channel_index()
 
-        decrypted = try_decrypt_packet_with_channel_key(raw_bytes, channel_key_bytes)
-        if not decrypted:
-            continue
+    match = try_decrypt_packet_with_channel_index(raw_bytes, index)
+    if match is None:
+        # Couldn't decrypt with any known key
+        return None
 
-        # Successfully decrypted!
-        logger.debug(
-            "Decrypted GroupText for channel %s: %s",
-            channel.name, decrypted.message[:50]
-        )
+    prepared, decrypted = match
+    channel = channels_by_key[prepared.key]
 
-        # Check for repeat detection (our own message echoed back)
-        is_repeat = False
-        _cleanup_expired_repeats()
-        text_hash = str(hash(decrypted.message))
-
-        for ts_offset in range(-5, 6):
-            key = (channel.key, text_hash, decrypted.timestamp + ts_offset)
-            if key in _pending_repeats:
-                message_id = _pending_repeats[key]
-                # Don't pop - let it expire naturally so subsequent repeats via
-                # different radio paths are also caught as duplicates
-                logger.info("Repeat detected for channel message %d", message_id)
-                ack_count = await MessageRepository.increment_ack_count(message_id)
-                broadcast_event("message_acked", {"message_id": message_id, "ack_count": ack_count})
-                is_repeat = True
-                break
-
-        if is_repeat:
-            # Mark packet as decrypted but don't create new message
-            await RawPacketRepository.mark_decrypted(packet_id, message_id)
-            return {
-                "decrypted": True,
-                "channel_name": channel.name,
-                "sender": decrypted.sender,
-                "message_id": message_id,
-            }
-
-        # Format the message text
-        if decrypted.sender:
-            text = f"{decrypted.sender}: {decrypted.message}"
-        else:
-            text = decrypted.message
-
-        # Try to create message - INSERT OR IGNORE handles duplicates atomically
-        msg_id = await MessageRepository.create(
-            msg_type="CHAN",
-            text=text,
+    # Successfully decrypted!
+    logger.debug(
+        "Decrypted GroupText for channel %s: %s",
+        channel.name, decrypted.message[:50]
+    )
+
+    # Check for repeat detection (our own message echoed back)
+    is_repeat = False
+    _cleanup_expired_repeats()
+    text_hash = _text_hash(decrypted.message)
+
+    for ts_offset in range(-5, 6):
+        key = (channel.key, text_hash, decrypted.timestamp + ts_offset)
+        if key in _pending_repeats:
+            message_id = _pending_repeats[key]
+            # Don't pop - let it expire naturally so subsequent repeats via
+            # different radio paths are also caught as duplicates
+            logger.info("Repeat detected for channel message %d", message_id)
+            ack_count = await MessageRepository.increment_ack_count(message_id)
+            broadcast_event("message_acked", {"message_id": message_id, "ack_count": ack_count})
+            is_repeat = True
+            break
+
+    if is_repeat:
+        # Mark packet as decrypted but don't create new message
+        await RawPacketRepository.mark_decrypted(packet_id, message_id)
+        return {
+            "decrypted": True,
+            "channel_name": channel.name,
+            "sender": decrypted.sender,
+            "message_id": message_id,
+        }
+
+    # Format the message text
+    text = _channel_message_text(decrypted.sender, decrypted.message)
+
+    # Try to create message - INSERT OR IGNORE handles duplicates atomically
+    msg_id = await MessageRepository.create(
+        msg_type="CHAN",
+        text=text,
+        conversation_key=channel.key,
+        sender_timestamp=decrypted.timestamp,
+        received_at=timestamp,
+    )
+
+    if msg_id is None:
+        # Duplicate detected by database constraint (same message via different RF path)
+        # Find existing message ID for packet linkage
+        existing_id = await MessageRepository.find_duplicate(
             conversation_key=channel.key,
+            text=text,
             sender_timestamp=decrypted.timestamp,
-            received_at=timestamp,
         )
-
-        if msg_id is None:
-            # Duplicate detected by database constraint (same message via different RF path)
-            # Find existing message ID for packet linkage
-            existing_id = await MessageRepository.find_duplicate(
-                conversation_key=channel.key,
-                text=text,
-                sender_timestamp=decrypted.timestamp,
-            )
-            logger.debug(
-                "Duplicate message detected for channel %s (existing id=%s)",
-                channel.name, existing_id
-            )
-            if existing_id:
-                await RawPacketRepository.mark_decrypted(packet_id, existing_id)
-            return {
-                "decrypted": True,
-                "channel_name": channel.name,
-                "sender": decrypted.sender,
-                "message_id": existing_id,
-            }
-
-        logger.info("Stored channel message %d for %s", msg_id, channel.name)
-
-        # Broadcast new message (only for genuinely new messages)
-        broadcast_event("message", {
-            "id": msg_id,
-            "type": "CHAN",
-            "conversation_key": channel.key,
-            "text": text,
-            "sender_timestamp": decrypted.timestamp,
-            "received_at": timestamp,
-            "path_len": packet_info.path_length if packet_info else None,
-            "txt_type": 0,
-            "signature": None,
-            "outgoing": False,
-            "acked": 0,
-        })
-
-        # Mark the raw packet as decrypted
-        await RawPacketRepository.mark_decrypted(packet_id, msg_id)
-
+        logger.debug(
+            "Duplicate message detected for channel %s (existing id=%s)",
+            channel.name, existing_id
+        )
+        if existing_id:
+            await RawPacketRepository.mark_decrypted(packet_id, existing_id)
         return {
             "decrypted": True,
             "channel_name": channel.name,
             "sender": decrypted.sender,
-            "message_id": msg_id,
+            "message_id": existing_id,
         }
 
-    # Couldn't decrypt with any known key
-    return None
+    logger.info("Stored channel message %d for %s", msg_id, channel.name)
+
+    # Broadcast new message (only for genuinely new messages)
+    _broadcast_channel_message(
+        msg_id,
+        channel.key,
+        text,
+        decrypted.timestamp,
+        timestamp,
+        path_len=packet_info.path_length if packet_info else None,
+    )
+
+    # Mark the raw packet as decrypted
+    await RawPacketRepository.mark_decrypted(packet_id, msg_id)
+
+    return {
+        "decrypted": True,
+        "channel_name": channel.name,
+        "sender": decrypted.sender,
+        "message_id": msg_id,
+    }
 
 
 async def _process_advertisement(
@@ -3,6 +3,7 @@ import glob
 import logging
 import platform
 from pathlib import Path
+from typing import Any
 
 from meshcore import MeshCore
 
@@ -10,6 +11,9 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Public key prefix length used for radio contact lookups throughout the app
+CONTACT_PREFIX_LEN = 12
+
 
 def detect_serial_devices() -> list[str]:
     """Detect available serial devices based on platform."""
@@ -106,6 +110,10 @@ class RadioManager:
         self._reconnect_task: asyncio.Task | None = None
         self._last_connected: bool = False
         self._reconnecting: bool = False
+        # Index of the meshcore contact cache by lowercase public key prefix
+        self._prefix_index: dict[str, dict[str, Any]] = {}
+        self._indexed_contacts: dict[str, Any] | None = None
+        self._indexed_count: int = 0
 
     @property
     def meshcore(self) -> MeshCore | None:
@@ -123,6 +131,32 @@ class RadioManager:
     def is_reconnecting(self) -> bool:
         return self._reconnecting
 
+    def get_contact_by_key_prefix(self, prefix: str) -> dict[str, Any] | None:
+        """Find a contact in the radio's contact cache by public key prefix.
+
+        Lookups by the standard 12-char prefix are served from an index that is
+        rebuilt whenever meshcore's contact cache changes; other prefix lengths
+        fall back to meshcore's linear scan.
+        """
+        mc = self._meshcore
+        if mc is None or not prefix:
+            return None
+        if len(prefix) != CONTACT_PREFIX_LEN:
+            return mc.get_contact_by_key_prefix(prefix)
+
+        contacts = mc.contacts
+        if contacts is not self._indexed_contacts or len(contacts) != self._indexed_count:
+            index: dict[str, dict[str, Any]] = {}
+            for contact in contacts.values():
+                key = contact.get("public_key", "")[:CONTACT_PREFIX_LEN].lower()
+                # First match wins, same as meshcore's scan
+                index.setdefault(key, contact)
+            self._prefix_index = index
+            self._indexed_contacts = contacts
+            self._indexed_count = len(contacts)
+
+        return self._prefix_index.get(prefix.lower())
+
     async def connect(self) -> None:
         """Connect to the radio over serial."""
         if self._meshcore is not None:
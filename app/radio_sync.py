@@ -386,7 +386,7 @@ async def sync_recent_contacts_to_radio(force: bool = False) -> dict:
 
         for contact in contacts:
             # Check if already on radio
-            radio_contact = mc.get_contact_by_key_prefix(contact.public_key[:12])
+            radio_contact = radio_manager.get_contact_by_key_prefix(contact.public_key[:12])
             if radio_contact:
                 already_on_radio += 1
                 # Update DB if not marked as on_radio
@@ -1,8 +1,10 @@
 import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 from app.database import db
 from app.models import Channel, Contact, Message, RawPacket
+from app.snapshots import invalidate_snapshot
 
 
 class ContactRepository:
@@ -42,6 +44,7 @@ class ContactRepository:
             ),
         )
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
     @staticmethod
     def _row_to_contact(row) -> Contact:
@@ -124,6 +127,7 @@ class ContactRepository:
             (path, path_len, int(time.time()), public_key),
         )
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
     @staticmethod
     async def set_on_radio(public_key: str, on_radio: bool) -> None:
@@ -132,6 +136,7 @@ class ContactRepository:
             (on_radio, public_key),
         )
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
     @staticmethod
     async def delete(public_key: str) -> None:
@@ -140,6 +145,7 @@ class ContactRepository:
             (public_key,),
         )
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
     @staticmethod
     async def update_last_contacted(public_key: str, timestamp: int | None = None) -> None:
@@ -150,12 +156,14 @@ class ContactRepository:
             (ts, ts, public_key),
         )
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
     @staticmethod
     async def clear_all_on_radio() -> None:
         """Clear the on_radio flag for all contacts."""
         await db.conn.execute("UPDATE contacts SET on_radio = 0")
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
     @staticmethod
     async def set_multiple_on_radio(public_keys: list[str], on_radio: bool = True) -> None:
@@ -168,6 +176,7 @@ class ContactRepository:
             [on_radio] + public_keys,
         )
         await db.conn.commit()
+        invalidate_snapshot("contacts")
 
 
 class ChannelRepository:
@@ -186,6 +195,7 @@ class ChannelRepository:
             (key.upper(), name, is_hashtag, on_radio),
         )
         await db.conn.commit()
+        invalidate_snapshot("channels")
 
     @staticmethod
     async def get_by_key(key: str) -> Channel | None:
@@ -244,6 +254,7 @@ class ChannelRepository:
             (key.upper(),),
         )
         await db.conn.commit()
+        invalidate_snapshot("channels")
 
 
 class MessageRepository:
@@ -265,6 +276,66 @@ class MessageRepository:
         (type, conversation_key, text, sender_timestamp). This prevents
         duplicate messages when the same message arrives via multiple RF paths.
         """
+        message_id = await MessageRepository._insert(
+            msg_type, text, received_at, conversation_key, sender_timestamp,
+            path_len, txt_type, signature, outgoing,
+        )
+        await db.conn.commit()
+        return message_id
+
+    @staticmethod
+    async def create_and_touch_contact(
+        msg_type: str,
+        text: str,
+        received_at: int,
+        conversation_key: str,
+        sender_timestamp: int | None = None,
+        path_len: int | None = None,
+        txt_type: int = 0,
+        signature: str | None = None,
+        outgoing: bool = False,
+    ) -> int | None:
+        """Create a direct message and update the contact's last_contacted in one commit.
+
+        conversation_key is the contact's public key. The contact is touched even
+        when the message is a duplicate; returns the ID or None if duplicate, like create().
+        """
+        message_id = await MessageRepository._insert(
+            msg_type, text, received_at, conversation_key, sender_timestamp,
+            path_len, txt_type, signature, outgoing,
+        )
+        await db.conn.execute(
+            "UPDATE contacts SET last_contacted = ?, last_seen = ? WHERE public_key = ?",
+            (received_at, received_at, conversation_key),
+        )
+        await db.conn.commit()
+        invalidate_snapshot("contacts")
+        return message_id
+
+    @staticmethod
+    async def create_many(messages: list[dict]) -> list[int | None]:
+        """Create several messages with a single commit.
+
+        Each dict takes the same keyword arguments as create(). Returns one ID per
+        message, in order, with None for duplicates.
+        """
+        message_ids = [await MessageRepository._insert(**message) for message in messages]
+        await db.conn.commit()
+        return message_ids
+
+    @staticmethod
+    async def _insert(
+        msg_type: str,
+        text: str,
+        received_at: int,
+        conversation_key: str,
+        sender_timestamp: int | None = None,
+        path_len: int | None = None,
+        txt_type: int = 0,
+        signature: str | None = None,
+        outgoing: bool = False,
+    ) -> int | None:
+        """Insert a message without committing. Returns the ID or None if duplicate."""
         cursor = await db.conn.execute(
             """
             INSERT OR IGNORE INTO messages (type, conversation_key, text, sender_timestamp,
@@ -274,9 +345,11 @@ class MessageRepository:
             (msg_type, conversation_key, text, sender_timestamp, received_at,
              path_len, txt_type, signature, outgoing),
         )
-        await db.conn.commit()
-        # lastrowid is 0 if no row was inserted (duplicate)
-        return cursor.lastrowid if cursor.lastrowid else None
+        # rowcount is 0 if INSERT was ignored due to duplicate; lastrowid would
+        # still hold the connection's previous insert
+        if cursor.rowcount == 0:
+            return None
+        return cursor.lastrowid
 
     @staticmethod
     async def get_all(
@@ -429,22 +502,40 @@ class RawPacketRepository:
         return cursor.lastrowid
 
     @staticmethod
-    async def get_undecrypted_count() -> int:
-        """Get count of undecrypted packets."""
+    async def get_undecrypted_count(after_id: int = 0) -> int:
+        """Get count of undecrypted packets, optionally only those with id > after_id."""
         cursor = await db.conn.execute(
-            "SELECT COUNT(*) as count FROM raw_packets WHERE decrypted = 0"
+            "SELECT COUNT(*) as count FROM raw_packets WHERE decrypted = 0 AND id > ?",
+            (after_id,),
         )
         row = await cursor.fetchone()
         return row["count"] if row else 0
 
     @staticmethod
-    async def get_all_undecrypted() -> list[tuple[int, bytes, int]]:
-        """Get all undecrypted packets as (id, data, timestamp) tuples."""
-        cursor = await db.conn.execute(
-            "SELECT id, data, timestamp FROM raw_packets WHERE decrypted = 0 ORDER BY timestamp ASC"
-        )
-        rows = await cursor.fetchall()
-        return [(row["id"], bytes(row["data"]), row["timestamp"]) for row in rows]
+    async def iter_undecrypted(
+        batch_size: int = 512, after_id: int = 0
+    ) -> AsyncIterator[list[tuple[int, bytes, int]]]:
+        """Stream undecrypted packets in batches of (id, data, timestamp) tuples, oldest first.
+
+        Pages by id rather than OFFSET, so packets marked decrypted mid-scan
+        don't shift later pages. Only packets with id > after_id are returned.
+        """
+        last_id = after_id
+        while True:
+            cursor = await db.conn.execute(
+                """
+                SELECT id, data, timestamp FROM raw_packets
+                WHERE decrypted = 0 AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (last_id, batch_size),
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                return
+            yield [(row["id"], bytes(row["data"]), row["timestamp"]) for row in rows]
+            last_id = rows[-1]["id"]
 
     @staticmethod
     async def mark_decrypted(packet_id: int, message_id: int) -> None:
@@ -454,6 +545,15 @@ class RawPacketRepository:
         )
         await db.conn.commit()
 
+    @staticmethod
+    async def mark_many_decrypted(links: list[tuple[int, int]]) -> None:
+        """Mark several packets decrypted in one commit. Takes (packet_id, message_id) pairs."""
+        await db.conn.executemany(
+            "UPDATE raw_packets SET decrypted = 1, message_id = ? WHERE id = ?",
+            [(message_id, packet_id) for packet_id, message_id in links],
+        )
+        await db.conn.commit()
+
     @staticmethod
     async def get_undecrypted(limit: int = 100) -> list[RawPacket]:
         cursor = await db.conn.execute(
@@ -1,10 +1,10 @@
 import logging
-from hashlib import sha256
 
 from fastapi import APIRouter, HTTPException, Query
 from meshcore import EventType
 from pydantic import BaseModel, Field
 
+from app.decoder import derive_channel_key
 from app.dependencies import require_connected
 from app.models import Channel
 from app.repository import ChannelRepository
@@ -58,7 +58,7 @@ async def create_channel(request: CreateChannelRequest) -> Channel:
             raise HTTPException(status_code=400, detail="Invalid hex string for key")
     else:
         # Derive key from name hash (same as meshcore library does)
-        key_bytes = sha256(request.name.encode("utf-8")).digest()[:16]
+        key_bytes = derive_channel_key(request.name)
 
     key_hex = key_bytes.hex().upper()
     logger.info("Creating channel %s: %s (hashtag=%s)", key_hex, request.name, is_hashtag)
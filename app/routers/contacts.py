@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import time
 
 from fastapi import APIRouter, HTTPException, Query
 from meshcore import EventType
@@ -14,14 +16,6 @@ from app.models import (
     CommandResponse,
     CONTACT_TYPE_REPEATER,
 )
-
-# ACL permission level names
-ACL_PERMISSION_NAMES = {
-    0: "Guest",
-    1: "Read-only",
-    2: "Read-write",
-    3: "Admin",
-}
 from app.radio import radio_manager
 from app.radio_sync import pause_polling
 from app.repository import ContactRepository
@@ -29,6 +23,27 @@ from app.repository import ContactRepository
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+# ACL permission level names, indexed by permission level
+ACL_PERMISSION_NAMES = ("Guest", "Read-only", "Read-write", "Admin")
+
+
+def acl_permission_name(perm: int) -> str:
+    """Get the human-readable name for an ACL permission level."""
+    if 0 <= perm < len(ACL_PERMISSION_NAMES):
+        return ACL_PERMISSION_NAMES[perm]
+    return f"Unknown({perm})"
+
+
+# In-flight telemetry requests keyed by (repeater public key, password). Concurrent
+# callers with the same credentials await the existing task instead of repeating the
+# radio exchange; a different password never joins another caller's login.
+_inflight_telemetry: dict[tuple[str, str], asyncio.Task] = {}
+
+# Repeaters we recently logged in to: public key -> time.monotonic() expiry.
+# While a session is fresh, CLI commands skip the remove/re-add dance.
+_repeater_sessions: dict[str, float] = {}
+REPEATER_SESSION_TTL_SECONDS = 300
+
 
 async def ensure_repeater_on_radio(mc, contact: Contact) -> None:
     """Ensure a repeater contact is on the radio with flood mode.
@@ -47,25 +62,19 @@ async def ensure_repeater_on_radio(mc, contact: Contact) -> None:
     logger.info("Syncing contacts from radio before repeater operation")
     await mc.ensure_contacts()
 
-    # Remove contact if it exists (clears any stale state on radio)
-    radio_contact = mc.get_contact_by_key_prefix(contact.public_key[:12])
+    # Remove contact if it exists (clears any stale state on radio). No refresh is
+    # needed here: the contact list is re-fetched once after the add below.
+    radio_contact = radio_manager.get_contact_by_key_prefix(contact.public_key[:12])
     if radio_contact:
         logger.info("Removing existing contact %s from radio", contact.public_key[:12])
         await mc.commands.remove_contact(contact.public_key)
-        await mc.commands.get_contacts()
 
     # Add contact fresh with flood mode
     logger.info("Adding repeater %s to radio with flood mode", contact.public_key[:12])
     contact_data = {
-        "public_key": contact.public_key,
-        "adv_name": contact.name or "",
-        "type": contact.type,
-        "flags": contact.flags,
+        **contact.to_radio_dict(),
         "out_path": "",
         "out_path_len": -1,  # Flood mode
-        "adv_lat": contact.lat or 0.0,
-        "adv_lon": contact.lon or 0.0,
-        "last_advert": contact.last_advert or 0,
     }
     add_result = await mc.commands.add_contact(contact_data)
     if add_result.type == EventType.ERROR:
@@ -76,7 +85,7 @@ async def ensure_repeater_on_radio(mc, contact: Contact) -> None:
 
     # Refresh and verify
     await mc.commands.get_contacts()
-    radio_contact = mc.get_contact_by_key_prefix(contact.public_key[:12])
+    radio_contact = radio_manager.get_contact_by_key_prefix(contact.public_key[:12])
     if not radio_contact:
         raise HTTPException(
             status_code=500,
@@ -97,6 +106,7 @@ async def prepare_repeater_connection(mc, contact: Contact, password: str) -> No
     Raises:
         HTTPException: If contact cannot be added or login fails
     """
+    _repeater_sessions.pop(contact.public_key, None)
     await ensure_repeater_on_radio(mc, contact)
 
     # Send login with password
@@ -109,6 +119,19 @@ async def prepare_repeater_connection(mc, contact: Contact, password: str) -> No
             detail=f"Login failed: {login_result.payload}"
         )
 
+    _repeater_sessions[contact.public_key] = time.monotonic() + REPEATER_SESSION_TTL_SECONDS
+
+
+def has_repeater_session(public_key: str) -> bool:
+    """Check if we logged in to a repeater recently and it is still on the radio."""
+    expires_at = _repeater_sessions.get(public_key)
+    if expires_at is None:
+        return False
+    if expires_at <= time.monotonic():
+        del _repeater_sessions[public_key]
+        return False
+    return radio_manager.get_contact_by_key_prefix(public_key[:12]) is not None
+
 
 @router.get("", response_model=list[Contact])
 async def list_contacts(
@@ -166,13 +189,14 @@ async def remove_contact_from_radio(public_key: str) -> dict:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     # Get the contact from radio
-    radio_contact = mc.get_contact_by_key_prefix(contact.public_key[:12])
+    radio_contact = radio_manager.get_contact_by_key_prefix(contact.public_key[:12])
     if not radio_contact:
         # Already not on radio
         await ContactRepository.set_on_radio(contact.public_key, False)
         return {"status": "ok", "message": "Contact was not on radio"}
 
     logger.info("Removing contact %s from radio", contact.public_key[:12])
+    _repeater_sessions.pop(contact.public_key, None)
 
     result = await mc.commands.remove_contact(radio_contact)
 
@@ -196,7 +220,7 @@ async def add_contact_to_radio(public_key: str) -> dict:
         raise HTTPException(status_code=404, detail="Contact not found in database")
 
     # Check if already on radio
-    radio_contact = mc.get_contact_by_key_prefix(contact.public_key[:12])
+    radio_contact = radio_manager.get_contact_by_key_prefix(contact.public_key[:12])
     if radio_contact:
         return {"status": "ok", "message": "Contact already on radio"}
 
@@ -224,12 +248,13 @@ async def delete_contact(public_key: str) -> dict:
     # Remove from radio if connected and contact is on radio
     if radio_manager.is_connected and radio_manager.meshcore:
         mc = radio_manager.meshcore
-        radio_contact = mc.get_contact_by_key_prefix(contact.public_key[:12])
+        radio_contact = radio_manager.get_contact_by_key_prefix(contact.public_key[:12])
         if radio_contact:
             logger.info("Removing contact %s from radio before deletion", contact.public_key[:12])
             await mc.commands.remove_contact(radio_contact)
 
     # Delete from database
+    _repeater_sessions.pop(contact.public_key, None)
     await ContactRepository.delete(contact.public_key)
     logger.info("Deleted contact %s", contact.public_key[:12])
 
@@ -241,7 +266,8 @@ async def request_telemetry(public_key: str, request: TelemetryRequest) -> Telem
     """Request telemetry from a repeater.
 
     The contact must be a repeater (type=2). If not on the radio, it will be added.
-    Uses login + status request with retry logic.
+    Uses login + status request with retry logic. Concurrent requests for the same
+    repeater share a single radio exchange.
     """
     mc = require_connected()
 
@@ -257,8 +283,34 @@ async def request_telemetry(public_key: str, request: TelemetryRequest) -> Telem
             detail=f"Contact is not a repeater (type={contact.type}, expected {CONTACT_TYPE_REPEATER})"
         )
 
+    inflight_key = (contact.public_key, request.password)
+    task = _inflight_telemetry.get(inflight_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_telemetry(mc, contact, request.password))
+        _inflight_telemetry[inflight_key] = task
+        task.add_done_callback(lambda t: _telemetry_task_done(inflight_key, t))
+    else:
+        logger.info("Joining in-flight telemetry request for %s", contact.public_key[:12])
+
+    # Shield so one caller disconnecting doesn't cancel the exchange for the others
+    return await asyncio.shield(task)
+
+
+def _telemetry_task_done(inflight_key: tuple[str, str], task: asyncio.Task) -> None:
+    """Forget a finished telemetry task and retrieve its exception.
+
+    The task is shielded, so if every caller was cancelled nobody awaits it; retrieving
+    the exception here keeps asyncio from logging "Task exception was never retrieved".
+    """
+    _inflight_telemetry.pop(inflight_key, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Telemetry request for %s failed: %s", inflight_key[0][:12], task.exception())
+
+
+async def _fetch_telemetry(mc, contact: Contact, password: str) -> TelemetryResponse:
+    """Log in to a repeater and fetch its status, neighbors, and ACL."""
     # Prepare connection (add/remove dance + login)
-    await prepare_repeater_connection(mc, contact, request.password)
+    await prepare_repeater_connection(mc, contact, password)
 
     # Request status with retries
     logger.info("Requesting status from repeater %s", contact.public_key[:12])
@@ -338,33 +390,16 @@ async def request_telemetry(public_key: str, request: TelemetryRequest) -> Telem
                 pubkey_prefix=pubkey_prefix,
                 name=resolved_contact.name if resolved_contact else None,
                 permission=perm,
-                permission_name=ACL_PERMISSION_NAMES.get(perm, f"Unknown({perm})"),
+                permission_name=acl_permission_name(perm),
             ))
 
-    # Convert raw telemetry to response format
-    # bat is in mV, convert to V (e.g., 3775 -> 3.775)
-    return TelemetryResponse(
-        pubkey_prefix=status.get("pubkey_pre", contact.public_key[:12]),
-        battery_volts=status.get("bat", 0) / 1000.0,
-        tx_queue_len=status.get("tx_queue_len", 0),
-        noise_floor_dbm=status.get("noise_floor", 0),
-        last_rssi_dbm=status.get("last_rssi", 0),
-        last_snr_db=status.get("last_snr", 0.0),
-        packets_received=status.get("nb_recv", 0),
-        packets_sent=status.get("nb_sent", 0),
-        airtime_seconds=status.get("airtime", 0),
-        rx_airtime_seconds=status.get("rx_airtime", 0),
-        uptime_seconds=status.get("uptime", 0),
-        sent_flood=status.get("sent_flood", 0),
-        sent_direct=status.get("sent_direct", 0),
-        recv_flood=status.get("recv_flood", 0),
-        recv_direct=status.get("recv_direct", 0),
-        flood_dups=status.get("flood_dups", 0),
-        direct_dups=status.get("direct_dups", 0),
-        full_events=status.get("full_evts", 0),
-        neighbors=neighbors,
-        acl=acl_entries,
-    )
+    # Convert raw telemetry to response format (field mapping lives on the model)
+    return TelemetryResponse.model_validate({
+        "pubkey_pre": contact.public_key[:12],
+        **status,
+        "neighbors": neighbors,
+        "acl": acl_entries,
+    })
 
 
 @router.post("/{public_key}/command", response_model=CommandResponse)
@@ -373,7 +408,8 @@ async def send_repeater_command(public_key: str, request: CommandRequest) -> Com
 
     The contact must be a repeater (type=2). The user must have already logged in
     via the telemetry endpoint. This endpoint ensures the contact is on the radio
-    before sending commands (the repeater remembers ACL permissions after login).
+    before sending commands (the repeater remembers ACL permissions after login),
+    skipping that step within REPEATER_SESSION_TTL_SECONDS of a successful login.
 
     Common commands:
     - get name, set name <value>
@@ -401,14 +437,24 @@ async def send_repeater_command(public_key: str, request: CommandRequest) -> Com
 
     # Pause message polling to prevent it from stealing our response
     async with pause_polling():
-        # Ensure the repeater contact is on the radio (fixes error_code 2 / ERR_CODE_NOT_FOUND)
-        await ensure_repeater_on_radio(mc, contact)
+        # Ensure the repeater contact is on the radio (fixes error_code 2 / ERR_CODE_NOT_FOUND).
+        # Skipped while a recent login session is fresh; the repeater keeps ACL state.
+        session_fresh = has_repeater_session(contact.public_key)
+        if not session_fresh:
+            await ensure_repeater_on_radio(mc, contact)
 
         # Send the command
         logger.info("Sending command to repeater %s: %s", contact.public_key[:12], request.command)
 
         send_result = await mc.commands.send_cmd(contact.public_key, request.command)
 
+        if send_result.type == EventType.ERROR and session_fresh:
+            # The contact may have been offloaded from the radio since login
+            logger.info("Command failed with cached session, re-adding repeater %s", contact.public_key[:12])
+            _repeater_sessions.pop(contact.public_key, None)
+            await ensure_repeater_on_radio(mc, contact)
+            send_result = await mc.commands.send_cmd(contact.public_key, request.command)
+
         if send_result.type == EventType.ERROR:
             raise HTTPException(
                 status_code=500,
@@ -7,6 +7,7 @@ from meshcore import EventType
 from app.dependencies import require_connected
 from app.event_handlers import track_pending_ack, track_pending_repeat
 from app.models import Message, SendChannelMessageRequest, SendDirectMessageRequest
+from app.radio import radio_manager
 from app.repository import MessageRepository
 
 logger = logging.getLogger(__name__)
@@ -57,7 +58,7 @@ async def send_direct_message(request: SendDirectMessageRequest) -> Message:
         )
 
     # Check if contact is on radio, if not add it
-    contact = mc.get_contact_by_key_prefix(db_contact.public_key[:12])
+    contact = radio_manager.get_contact_by_key_prefix(db_contact.public_key[:12])
     if not contact:
         logger.info("Adding contact %s to radio before sending", db_contact.public_key[:12])
         contact_data = db_contact.to_radio_dict()
@@ -67,7 +68,7 @@ async def send_direct_message(request: SendDirectMessageRequest) -> Message:
             # Continue anyway - might still work
 
         # Get the contact from radio again
-        contact = mc.get_contact_by_key_prefix(db_contact.public_key[:12])
+        contact = radio_manager.get_contact_by_key_prefix(db_contact.public_key[:12])
         if not contact:
             # Use the contact_data we built as fallback
             contact = contact_data
@@ -85,9 +86,9 @@ async def send_direct_message(request: SendDirectMessageRequest) -> Message:
             detail=f"Failed to send message: {result.payload}"
         )
 
-    # Store outgoing message
+    # Store outgoing message and update last_contacted for the contact (one commit)
     now = int(time.time())
-    message_id = await MessageRepository.create(
+    message_id = await MessageRepository.create_and_touch_contact(
         msg_type="PRIV",
         text=request.text,
         conversation_key=db_contact.public_key,
@@ -96,9 +97,6 @@ async def send_direct_message(request: SendDirectMessageRequest) -> Message:
         outgoing=True,
     )
 
-    # Update last_contacted for the contact
-    await ContactRepository.update_last_contacted(db_contact.public_key, now)
-
     # Track the expected ACK for this message
     expected_ack = result.payload.get("expected_ack")
     suggested_timeout = result.payload.get("suggested_timeout", 10000)  # default 10s
@@ -1,11 +1,17 @@
+import asyncio
 import logging
-from hashlib import sha256
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
-from app.decoder import try_decrypt_packet_with_channel_key
-from app.packet_processor import create_message_from_decrypted
+from app.decoder import DecryptedGroupText, derive_channel_key, try_decrypt_packets_with_channel_key
+from app.dependencies import json_body, json_body_openapi
+from app.packet_processor import create_messages_from_decrypted
 from app.repository import RawPacketRepository
 
 logger = logging.getLogger(__name__)
@@ -31,63 +37,151 @@ class DecryptProgress(BaseModel):
     in_progress: bool
 
 
-# Global state for tracking decryption progress
-_decrypt_progress: DecryptProgress | None = None
+# Global state for tracking decryption progress, updated in place by the
+# background task and converted to DecryptProgress only when requested
+_decrypt_progress: dict | None = None
 
+# Running historical decryption task; the lock makes check-and-start atomic
+_decrypt_task: asyncio.Task | None = None
+_decrypt_lock = asyncio.Lock()
 
-async def _run_historical_decryption(channel_key_bytes: bytes, channel_key_hex: str) -> None:
-    """Background task to decrypt historical packets with a channel key."""
+# Highest packet id already scanned with each channel key (uppercase hex), so
+# re-running a key only looks at packets that arrived since
+_scanned_through: dict[str, int] = {}
+
+# Packets sent to a worker process per hop during historical decryption
+DECRYPT_CHUNK_SIZE = 256
+
+# Decrypted messages buffered before a batched DB write
+DECRYPT_FLUSH_SIZE = 2000
+
+# Worker pool for historical trial decryption, created on first use
+_decrypt_pool: ProcessPoolExecutor | None = None
+
+
+def _get_decrypt_pool() -> ProcessPoolExecutor:
+    """Get the trial-decryption process pool, creating it if needed."""
+    global _decrypt_pool
+    if _decrypt_pool is None:
+        # spawn so workers don't inherit the event loop or the DB connection
+        _decrypt_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _decrypt_pool
+
+
+async def cancel_historical_decryption() -> None:
+    """Cancel a running historical decryption task and wait for it to stop."""
+    if _decrypt_task is not None and not _decrypt_task.done():
+        _decrypt_task.cancel()
+        try:
+            await _decrypt_task
+        except asyncio.CancelledError:
+            pass
+
+
+def shutdown_decrypt_pool() -> None:
+    """Shut down the trial-decryption process pool if it was started."""
+    global _decrypt_pool
+    if _decrypt_pool is not None:
+        _decrypt_pool.shutdown(wait=False, cancel_futures=True)
+        _decrypt_pool = None
+
+
+async def _run_historical_decryption(
+    channel_key_bytes: bytes, channel_key_hex: str, after_id: int = 0
+) -> None:
+    """Background task to decrypt historical packets (id > after_id) with a channel key."""
     global _decrypt_progress
 
-    packets = await RawPacketRepository.get_all_undecrypted()
-    total = len(packets)
+    total = await RawPacketRepository.get_undecrypted_count(after_id)
     processed = 0
     decrypted_count = 0
+    last_id = after_id
 
-    _decrypt_progress = DecryptProgress(
-        total=total, processed=0, decrypted=0, in_progress=True
-    )
+    _decrypt_progress = {"total": total, "processed": 0, "decrypted": 0, "in_progress": True}
 
     logger.info("Starting historical decryption of %d packets", total)
 
-    for packet_id, packet_data, packet_timestamp in packets:
-        result = try_decrypt_packet_with_channel_key(packet_data, channel_key_bytes)
+    # (packet_id, result, received_at) awaiting a batched write
+    pending: list[tuple[int, DecryptedGroupText, int]] = []
 
-        if result is not None:
-            # Successfully decrypted - use shared logic to store message
-            logger.debug(
-                "Decrypted packet %d: sender=%s, message=%s",
-                packet_id,
-                result.sender,
-                result.message[:50] if result.message else "",
-            )
+    async def store_results(chunk: list[tuple[int, bytes, int]], future: asyncio.Future) -> None:
+        nonlocal processed, decrypted_count, pending
 
-            msg_id = await create_message_from_decrypted(
-                packet_id=packet_id,
-                channel_key=channel_key_hex,
-                sender=result.sender,
-                message_text=result.message,
-                timestamp=result.timestamp,
-                received_at=packet_timestamp,  # Use original packet timestamp for correct ordering
+        results = await future
+        for (packet_id, _, packet_timestamp), result in zip(chunk, results):
+            if result is not None:
+                logger.debug(
+                    "Decrypted packet %d: sender=%s, message=%s",
+                    packet_id,
+                    result.sender,
+                    result.message[:50] if result.message else "",
+                )
+                # Use original packet timestamp for correct ordering
+                pending.append((packet_id, result, packet_timestamp))
+
+        if len(pending) >= DECRYPT_FLUSH_SIZE:
+            decrypted_count += await create_messages_from_decrypted(channel_key_hex, pending)
+            pending = []
+
+        processed += len(chunk)
+        _decrypt_progress["processed"] = processed
+        _decrypt_progress["decrypted"] = decrypted_count
+
+    # Trial decryption is CPU-bound and independent per packet; stream chunks from
+    # the DB out to worker processes, keeping a bounded number in flight, and
+    # store results on the loop in packet order
+    loop = asyncio.get_running_loop()
+    pool = _get_decrypt_pool()
+    max_in_flight = 2 * (os.cpu_count() or 1)
+    in_flight: deque[tuple[list[tuple[int, bytes, int]], asyncio.Future]] = deque()
+
+    try:
+        async for chunk in RawPacketRepository.iter_undecrypted(DECRYPT_CHUNK_SIZE, after_id):
+            last_id = chunk[-1][0]
+            future = loop.run_in_executor(
+                pool,
+                try_decrypt_packets_with_channel_key,
+                [packet_data for _, packet_data, _ in chunk],
+                channel_key_bytes,
             )
-
-            if msg_id is not None:
-                decrypted_count += 1
-
-        processed += 1
-        _decrypt_progress = DecryptProgress(
-            total=total, processed=processed, decrypted=decrypted_count, in_progress=True
-        )
-
-    _decrypt_progress = DecryptProgress(
-        total=total, processed=processed, decrypted=decrypted_count, in_progress=False
-    )
+            in_flight.append((chunk, future))
+            if len(in_flight) >= max_in_flight:
+                await store_results(*in_flight.popleft())
+
+        while in_flight:
+            await store_results(*in_flight.popleft())
+
+        if pending:
+            decrypted_count += await create_messages_from_decrypted(channel_key_hex, pending)
+
+        # Only recorded on a full pass; a cancelled run is rescanned next time
+        _scanned_through[channel_key_hex] = max(_scanned_through.get(channel_key_hex, 0), last_id)
+    except BrokenProcessPool:
+        # A worker died (OOM, killed); drop the pool so the next run starts a fresh one
+        logger.error("Historical decryption worker pool broke, discarding it")
+        shutdown_decrypt_pool()
+        raise
+    finally:
+        # Abandoned chunks after an error or cancellation; don't leave their results unretrieved
+        for _, future in in_flight:
+            future.cancel()
+        _decrypt_progress["decrypted"] = decrypted_count
+        _decrypt_progress["in_progress"] = False
 
     logger.info(
         "Historical decryption complete: %d/%d packets decrypted", decrypted_count, total
     )
 
 
+def _log_decrypt_task_result(task: asyncio.Task) -> None:
+    """Done-callback for _decrypt_task: log a failed run, since nothing awaits it."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Error during historical decryption: %s", task.exception())
+
+
 @router.get("/undecrypted/count")
 async def get_undecrypted_count() -> dict:
     """Get the count of undecrypted packets."""
@@ -95,49 +189,46 @@ async def get_undecrypted_count() -> dict:
     return {"count": count}
 
 
-@router.post("/decrypt/historical", response_model=DecryptResult)
+@router.post(
+    "/decrypt/historical",
+    response_model=DecryptResult,
+    openapi_extra=json_body_openapi(DecryptRequest),
+)
 async def decrypt_historical_packets(
-    request: DecryptRequest, background_tasks: BackgroundTasks
+    request: DecryptRequest = Depends(json_body(DecryptRequest)),
 ) -> DecryptResult:
     """
     Attempt to decrypt historical packets with the provided key.
     Runs in the background to avoid blocking.
-    """
-    global _decrypt_progress
-
-    # Check if decryption is already in progress
-    if _decrypt_progress and _decrypt_progress.in_progress:
-        return DecryptResult(
-            started=False,
-            total_packets=_decrypt_progress.total,
-            message=f"Decryption already in progress: {_decrypt_progress.processed}/{_decrypt_progress.total}",
-        )
 
+    Only one run happens at a time. Re-running a key only scans packets
+    that arrived since that key's last completed run.
+    """
     # Determine the channel key
     channel_key_bytes: bytes | None = None
     channel_key_hex: str | None = None
 
     if request.key_type == "channel":
         if request.channel_key:
-            # Direct key provided
+            # Direct key provided; the hex form is computed once here and passed through
             try:
                 channel_key_bytes = bytes.fromhex(request.channel_key)
-                if len(channel_key_bytes) != 16:
-                    return DecryptResult(
-                        started=False,
-                        total_packets=0,
-                        message="Channel key must be 16 bytes (32 hex chars)",
-                    )
-                channel_key_hex = request.channel_key.upper()
             except ValueError:
                 return DecryptResult(
                     started=False,
                     total_packets=0,
                     message="Invalid hex string for channel key",
                 )
+            if len(channel_key_bytes) != 16:
+                return DecryptResult(
+                    started=False,
+                    total_packets=0,
+                    message="Channel key must be 16 bytes (32 hex chars)",
+                )
+            channel_key_hex = channel_key_bytes.hex().upper()
         elif request.channel_name:
             # Derive key from channel name (hashtag channel)
-            channel_key_bytes = sha256(request.channel_name.encode("utf-8")).digest()[:16]
+            channel_key_bytes = derive_channel_key(request.channel_name)
             channel_key_hex = channel_key_bytes.hex().upper()
         else:
             return DecryptResult(
@@ -153,15 +244,31 @@ async def decrypt_historical_packets(
             message="Contact key decryption not yet supported",
         )
 
-    # Get count of undecrypted packets
-    count = await RawPacketRepository.get_undecrypted_count()
-    if count == 0:
-        return DecryptResult(
-            started=False, total_packets=0, message="No undecrypted packets to process"
-        )
+    global _decrypt_task
 
-    # Start background decryption
-    background_tasks.add_task(_run_historical_decryption, channel_key_bytes, channel_key_hex)
+    async with _decrypt_lock:
+        # Check if decryption is already in progress (including its final writes)
+        if _decrypt_task is not None and not _decrypt_task.done():
+            progress = _decrypt_progress or {"processed": 0, "total": 0}
+            return DecryptResult(
+                started=False,
+                total_packets=progress["total"],
+                message=f"Decryption already in progress: {progress['processed']}/{progress['total']}",
+            )
+
+        # Get count of undecrypted packets not yet scanned with this key
+        after_id = _scanned_through.get(channel_key_hex, 0)
+        count = await RawPacketRepository.get_undecrypted_count(after_id)
+        if count == 0:
+            return DecryptResult(
+                started=False, total_packets=0, message="No undecrypted packets to process"
+            )
+
+        # Start background decryption
+        _decrypt_task = asyncio.create_task(
+            _run_historical_decryption(channel_key_bytes, channel_key_hex, after_id)
+        )
+        _decrypt_task.add_done_callback(_log_decrypt_task_result)
 
     return DecryptResult(
         started=True,
@@ -173,4 +280,6 @@ async def decrypt_historical_packets(
 @router.get("/decrypt/progress", response_model=DecryptProgress | None)
 async def get_decrypt_progress() -> DecryptProgress | None:
     """Get the current progress of historical decryption."""
-    return _decrypt_progress
+    if _decrypt_progress is None:
+        return None
+    return DecryptProgress(**_decrypt_progress)
@@ -11,6 +11,20 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/radio", tags=["radio"])
 
 
+# Config PATCHes re-sync the radio clock at most this often per connection;
+# the frontend always sends every field, so each save otherwise costs a round trip
+TIME_SYNC_INTERVAL_SECONDS = 3600
+
+# Connection the clock was last synced on, and when (monotonic)
+_time_synced_mc: object | None = None
+_last_time_sync: float = 0.0
+
+
+def _time_sync_due(mc) -> bool:
+    """Whether the radio clock should be re-synced on this connection."""
+    return _time_synced_mc is not mc or time.monotonic() - _last_time_sync >= TIME_SYNC_INTERVAL_SECONDS
+
+
 class RadioSettings(BaseModel):
     freq: float = Field(description="Frequency in MHz")
     bw: float = Field(description="Bandwidth in kHz")
@@ -40,15 +54,35 @@ class PrivateKeyUpdate(BaseModel):
     private_key: str = Field(description="Private key as hex string")
 
 
+# Last response built from self_info, and the self_info dict it was built from.
+# meshcore replaces mc.self_info with a new dict on every SELF_INFO event (and a
+# reconnect brings a new MeshCore instance), so an identity check is enough to
+# know the cached response is still current.
+_cached_config: RadioConfigResponse | None = None
+_cached_config_info: dict | None = None
+
+
 @router.get("/config", response_model=RadioConfigResponse)
 async def get_radio_config() -> RadioConfigResponse:
     """Get the current radio configuration."""
+    global _cached_config, _cached_config_info
+
     mc = require_connected()
 
     info = mc.self_info
     if not info:
         raise HTTPException(status_code=503, detail="Radio info not available")
 
+    if _cached_config is not None and _cached_config_info is info:
+        return _cached_config
+
+    _cached_config = _build_radio_config(info)
+    _cached_config_info = info
+    return _cached_config
+
+
+def _build_radio_config(info: dict) -> RadioConfigResponse:
+    """Build the config response from the radio's self_info."""
     return RadioConfigResponse(
         public_key=info.get("public_key", ""),
         name=info.get("name", ""),
@@ -68,6 +102,8 @@ async def get_radio_config() -> RadioConfigResponse:
 @router.patch("/config", response_model=RadioConfigResponse)
 async def update_radio_config(update: RadioConfigUpdate) -> RadioConfigResponse:
     """Update radio configuration. Only provided fields will be updated."""
+    global _time_synced_mc, _last_time_sync
+
     mc = require_connected()
 
     if update.name is not None:
@@ -100,10 +136,13 @@ async def update_radio_config(update: RadioConfigUpdate) -> RadioConfigResponse:
             cr=update.radio.cr,
         )
 
-    # Sync time with system clock
-    now = int(time.time())
-    logger.debug("Syncing radio time to %d", now)
-    await mc.commands.set_time(now)
+    # Sync time with system clock, unless recently synced on this connection
+    if _time_sync_due(mc):
+        now = int(time.time())
+        logger.debug("Syncing radio time to %d", now)
+        await mc.commands.set_time(now)
+        _time_synced_mc = mc
+        _last_time_sync = time.monotonic()
 
     return await get_radio_config()
 
@@ -144,10 +183,14 @@ async def send_advertisement(flood: bool = True) -> dict:
 @router.post("/reboot")
 async def reboot_radio() -> dict:
     """Reboot the radio. Connection will temporarily drop and auto-reconnect."""
+    global _time_synced_mc
+
     mc = require_connected()
 
     logger.info("Rebooting radio")
     await mc.commands.reboot()
+    # The radio clock may reset on reboot
+    _time_synced_mc = None
 
     return {"status": "ok", "message": "Reboot command sent. Radio will reconnect automatically."}
 
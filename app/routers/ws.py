@@ -6,11 +6,15 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from app.radio import radio_manager
 from app.repository import ChannelRepository, ContactRepository
-from app.websocket import ws_manager
+from app.websocket import get_snapshot_frame, health_frame, ws_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Reply to the frontend's app-level keepalive. Kept as a text frame because the
+# client JSON.parses every message, and browsers can't send protocol-level pings.
+_PONG = '{"type":"pong"}'
+
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket) -> None:
@@ -20,27 +24,18 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
     # Send initial state
     try:
         # Health status
-        health_data = {
-            "radio_connected": radio_manager.is_connected,
-            "serial_port": radio_manager.port,
-        }
-        await ws_manager.send_personal(websocket, "health", health_data)
-
-        # Contacts
-        contacts = await ContactRepository.get_all(limit=500)
-        await ws_manager.send_personal(
-            websocket,
-            "contacts",
-            [c.model_dump() for c in contacts],
+        await ws_manager.send_frame(
+            websocket, health_frame(radio_manager.is_connected, radio_manager.port)
         )
 
-        # Channels
-        channels = await ChannelRepository.get_all()
-        await ws_manager.send_personal(
-            websocket,
-            "channels",
-            [c.model_dump() for c in channels],
+        # Contacts and channels (serialized once, reused until they change)
+        contacts_frame = await get_snapshot_frame(
+            "contacts", lambda: ContactRepository.get_all(limit=500)
         )
+        await ws_manager.send_frame(websocket, contacts_frame)
+
+        channels_frame = await get_snapshot_frame("channels", ChannelRepository.get_all)
+        await ws_manager.send_frame(websocket, channels_frame)
 
     except Exception as e:
         logger.error("Error sending initial state: %s", e)
@@ -53,7 +48,7 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
             data = await websocket.receive_text()
             # Client can send "ping" to keep alive
             if data == "ping":
-                await websocket.send_text('{"type":"pong"}')
+                await websocket.send_text(_PONG)
     except WebSocketDisconnect:
         await ws_manager.disconnect(websocket)
     except Exception as e:
@@ -0,0 +1,18 @@
+"""Change counters for tables whose contents are cached outside the database.
+
+Repository mutators bump the counter for the table they write; caches derived
+from that table (initial WebSocket frames, the realtime channel key index)
+record the version they were built at and rebuild when it moves.
+"""
+
+_snapshot_versions: dict[str, int] = {}
+
+
+def invalidate_snapshot(table: str) -> None:
+    """Mark a table as changed so caches built from it are rebuilt."""
+    _snapshot_versions[table] = _snapshot_versions.get(table, 0) + 1
+
+
+def snapshot_version(table: str) -> int:
+    """Current change counter for a table."""
+    return _snapshot_versions.get(table, 0)
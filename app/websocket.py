@@ -3,10 +3,14 @@
 import asyncio
 import json
 import logging
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
 from typing import Any
 
 from fastapi import WebSocket
 
+from app.snapshots import snapshot_version
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,62 +18,167 @@ class WebSocketManager:
     """Manages WebSocket connections and broadcasts events."""
 
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.active_connections: set[WebSocket] = set()
         self._lock = asyncio.Lock()
 
+    @property
+    def has_clients(self) -> bool:
+        """Whether any client is connected; callers skip building payloads when not."""
+        return bool(self.active_connections)
+
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
         async with self._lock:
-            self.active_connections.append(websocket)
+            self.active_connections.add(websocket)
         logger.info("WebSocket client connected (%d total)", len(self.active_connections))
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
+            self.active_connections.discard(websocket)
         logger.info("WebSocket client disconnected (%d remaining)", len(self.active_connections))
 
     async def broadcast(self, event_type: str, data: Any) -> None:
         """Broadcast an event to all connected clients."""
-        if not self.active_connections:
+        if not self.has_clients:
             return
 
         message = json.dumps({"type": event_type, "data": data})
 
+        # Snapshot under the lock, then send concurrently without holding it
         async with self._lock:
-            disconnected = []
-            for connection in self.active_connections:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.debug("Failed to send to client: %s", e)
-                    disconnected.append(connection)
-
-            # Clean up disconnected clients
-            for conn in disconnected:
-                if conn in self.active_connections:
-                    self.active_connections.remove(conn)
+            connections = list(self.active_connections)
+
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True,
+        )
+
+        disconnected = []
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.debug("Failed to send to client: %s", result)
+                disconnected.append(connection)
+
+        # Clean up disconnected clients
+        if disconnected:
+            async with self._lock:
+                self.active_connections.difference_update(disconnected)
 
     async def send_personal(self, websocket: WebSocket, event_type: str, data: Any) -> None:
         """Send an event to a specific client."""
-        message = json.dumps({"type": event_type, "data": data})
+        await self.send_frame(websocket, json.dumps({"type": event_type, "data": data}))
+
+    async def send_frame(self, websocket: WebSocket, message: str) -> None:
+        """Send an already-serialized event to a specific client."""
         try:
             await websocket.send_text(message)
         except Exception as e:
             logger.debug("Failed to send to client: %s", e)
 
 
+# Serialized initial-state frames (contacts, channels) sent to each new client,
+# keyed by event type and stored with the table version they were built at.
+_snapshot_frames: dict[str, tuple[int, str]] = {}
+
+
+async def get_snapshot_frame(event_type: str, load: Callable[[], Awaitable[list[Any]]]) -> str:
+    """Get the serialized initial-state frame for an event type, rebuilding it if stale.
+
+    load returns the Pydantic models to send.
+    """
+    version = snapshot_version(event_type)
+    cached = _snapshot_frames.get(event_type)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    items = await load()
+    frame = json.dumps({"type": event_type, "data": [item.model_dump() for item in items]})
+    # A write that landed during the load makes this frame stale; don't cache it
+    if snapshot_version(event_type) == version:
+        _snapshot_frames[event_type] = (version, frame)
+    return frame
+
+
 # Global instance
 ws_manager = WebSocketManager()
 
+# Broadcasts are queued and sent by a single worker task, so a burst of radio
+# events doesn't spawn a task per event all contending for the manager lock
+BROADCAST_QUEUE_SIZE = 1024
+
+# High-volume events that are dropped rather than sent out of band when the queue is full
+_DROPPABLE_EVENTS = frozenset({"raw_packet"})
+
+_broadcast_queue: asyncio.Queue | None = None
+_broadcast_worker: asyncio.Task | None = None
+
+# Newest health payload awaiting send; a burst of changes sends only the latest
+_pending_health: dict | None = None
+
+
+async def _broadcast_loop(queue: asyncio.Queue) -> None:
+    """Send queued broadcasts one at a time."""
+    global _pending_health
+    while True:
+        event_type, data = await queue.get()
+        if event_type == "health":
+            data, _pending_health = _pending_health, None
+            if data is None:
+                continue
+        try:
+            await ws_manager.broadcast(event_type, data)
+        except Exception as e:
+            logger.debug("Broadcast of %s failed: %s", event_type, e)
+
+
+def start_broadcast_worker() -> None:
+    """Start the broadcast worker task."""
+    global _broadcast_queue, _broadcast_worker, _pending_health
+    if _broadcast_worker is None or _broadcast_worker.done():
+        _broadcast_queue = asyncio.Queue(maxsize=BROADCAST_QUEUE_SIZE)
+        _pending_health = None
+        _broadcast_worker = asyncio.create_task(_broadcast_loop(_broadcast_queue))
+
+
+async def stop_broadcast_worker() -> None:
+    """Stop the broadcast worker task, dropping anything still queued."""
+    global _broadcast_queue, _broadcast_worker, _pending_health
+    if _broadcast_worker and not _broadcast_worker.done():
+        _broadcast_worker.cancel()
+        try:
+            await _broadcast_worker
+        except asyncio.CancelledError:
+            pass
+    _broadcast_queue = None
+    _broadcast_worker = None
+    # A health marker dropped with the queue must not block the next one
+    _pending_health = None
+
+
+def _enqueue_broadcast(event_type: str, data: Any) -> None:
+    """Queue a broadcast for the worker, or send it directly if no worker is running."""
+    if _broadcast_queue is None or _broadcast_worker is None or _broadcast_worker.done():
+        asyncio.create_task(ws_manager.broadcast(event_type, data))
+        return
+
+    try:
+        _broadcast_queue.put_nowait((event_type, data))
+    except asyncio.QueueFull:
+        if event_type in _DROPPABLE_EVENTS:
+            logger.debug("Broadcast queue full, dropping %s event", event_type)
+        else:
+            asyncio.create_task(ws_manager.broadcast(event_type, data))
+
 
 def broadcast_event(event_type: str, data: dict) -> None:
     """Schedule a broadcast without blocking.
 
-    Convenience function that creates an asyncio task to broadcast
-    an event to all connected WebSocket clients.
+    Convenience function that queues an event for broadcast to all
+    connected WebSocket clients.
     """
-    asyncio.create_task(ws_manager.broadcast(event_type, data))
+    if not ws_manager.has_clients:
+        return
+    _enqueue_broadcast(event_type, data)
 
 
 def broadcast_error(message: str, details: str | None = None) -> None:
@@ -77,16 +186,44 @@ def broadcast_error(message: str, details: str | None = None) -> None:
 
     This appears as a toast notification in the frontend.
     """
+    if not ws_manager.has_clients:
+        return
     data = {"message": message}
     if details:
         data["details"] = details
-    asyncio.create_task(ws_manager.broadcast("error", data))
+    _enqueue_broadcast("error", data)
 
 
-def broadcast_health(radio_connected: bool, serial_port: str | None = None) -> None:
-    """Broadcast health status change to all connected clients."""
-    asyncio.create_task(ws_manager.broadcast("health", {
+def _health_data(radio_connected: bool, serial_port: str | None) -> dict:
+    return {
         "status": "ok" if radio_connected else "degraded",
         "radio_connected": radio_connected,
         "serial_port": serial_port,
-    }))
+    }
+
+
+@lru_cache(maxsize=8)
+def health_frame(radio_connected: bool, serial_port: str | None) -> str:
+    """Serialized health event. There are only a few distinct states, so each is built once."""
+    return json.dumps({"type": "health", "data": _health_data(radio_connected, serial_port)})
+
+
+def broadcast_health(radio_connected: bool, serial_port: str | None = None) -> None:
+    """Broadcast health status change to all connected clients."""
+    global _pending_health
+    if not ws_manager.has_clients:
+        return
+    data = _health_data(radio_connected, serial_port)
+    if _broadcast_queue is None or _broadcast_worker is None or _broadcast_worker.done():
+        asyncio.create_task(ws_manager.broadcast("health", data))
+        return
+
+    # Only one health marker is queued at a time; it sends whatever is newest
+    already_queued = _pending_health is not None
+    _pending_health = data
+    if not already_queued:
+        try:
+            _broadcast_queue.put_nowait(("health", None))
+        except asyncio.QueueFull:
+            _pending_health = None
+            asyncio.create_task(ws_manager.broadcast("health", data))
@@ -1,6 +1,21 @@
 """Pytest configuration and shared fixtures."""
 
+import hashlib
+
 import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the whole session.
+
+    Deliberately not entered as a context manager: the app lifespan would open the
+    database and try to connect to a radio. Tests patch what they need per call.
+    """
+    from app.main import app
+
+    return TestClient(app)
 
 
 @pytest.fixture
@@ -12,5 +27,22 @@ def sample_channel_key():
 @pytest.fixture
 def sample_hashtag_key():
     """A channel key derived from hashtag name '#test'."""
-    import hashlib
     return hashlib.sha256(b"#test").digest()[:16]
+
+
+@pytest.fixture(scope="session")
+def six77_packet():
+    """A real GROUP_TEXT packet captured from the #six77 hashtag channel."""
+    return bytes.fromhex(
+        "1500E69C7A89DD0AF6A2D69F5823B88F9720731E4B887C56932BF889255D8D926D"
+        "99195927144323A42DD8A158F878B518B8304DF55E80501C7D02A9FFD578D35182"
+        "83156BBA257BF8413E80A237393B2E4149BBBC864371140A9BBC4E23EB9BF203EF"
+        "0D029214B3E3AAC3C0295690ACDB89A28619E7E5F22C83E16073AD679D25FA904D"
+        "07E5ACF1DB5A7C77D7E1719FB9AE5BF55541EE0D7F59ED890E12CF0FEED6700818"
+    )
+
+
+@pytest.fixture(scope="session")
+def six77_key():
+    """The channel key for '#six77', which decrypts six77_packet."""
+    return hashlib.sha256(b"#six77").digest()[:16]
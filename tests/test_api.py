@@ -1,27 +1,23 @@
 """Tests for API endpoints.
 
 These tests verify the REST API behavior for critical operations.
-Uses FastAPI's TestClient for synchronous testing.
+Uses a shared FastAPI TestClient (see conftest.py) for synchronous testing.
 """
 
-import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+
 
 class TestHealthEndpoint:
     """Test the health check endpoint."""
 
-    def test_health_returns_connection_status(self):
+    def test_health_returns_connection_status(self, client):
         """Health endpoint returns radio connection status."""
-        from fastapi.testclient import TestClient
-
         with patch("app.routers.health.radio_manager") as mock_rm:
             mock_rm.is_connected = True
             mock_rm.port = "/dev/ttyUSB0"
 
-            from app.main import app
-            client = TestClient(app)
-
             response = client.get("/api/health")
 
             assert response.status_code == 200
@@ -29,17 +25,12 @@ class TestHealthEndpoint:
             assert data["radio_connected"] is True
             assert data["serial_port"] == "/dev/ttyUSB0"
 
-    def test_health_disconnected_state(self):
+    def test_health_disconnected_state(self, client):
         """Health endpoint reflects disconnected radio."""
-        from fastapi.testclient import TestClient
-
         with patch("app.routers.health.radio_manager") as mock_rm:
             mock_rm.is_connected = False
             mock_rm.port = None
 
-            from app.main import app
-            client = TestClient(app)
-
             response = client.get("/api/health")
 
             assert response.status_code == 200
@@ -48,20 +39,34 @@ class TestHealthEndpoint:
             assert data["serial_port"] is None
 
 
+class TestRouteRegistration:
+    """Test that API routes are registered exactly once."""
+
+    def test_no_duplicate_routes(self):
+        """Each (method, path) pair is handled by exactly one endpoint."""
+        from collections import Counter
+        from app.routers import channels, contacts, health, messages, packets, radio, settings, ws
+
+        registrations = Counter(
+            (method, route.path)
+            for module in (channels, contacts, health, messages, packets, radio, settings, ws)
+            for route in module.router.routes
+            for method in (getattr(route, "methods", None) or {"WEBSOCKET"})
+        )
+
+        duplicates = [key for key, count in registrations.items() if count > 1]
+        assert duplicates == []
+
+
 class TestMessagesEndpoint:
     """Test message-related endpoints."""
 
-    def test_send_direct_message_requires_connection(self):
+    def test_send_direct_message_requires_connection(self, client):
         """Sending message when disconnected returns 503."""
-        from fastapi.testclient import TestClient
-
         with patch("app.dependencies.radio_manager") as mock_rm:
             mock_rm.is_connected = False
             mock_rm.meshcore = None
 
-            from app.main import app
-            client = TestClient(app)
-
             response = client.post(
                 "/api/messages/direct",
                 json={"destination": "abc123", "text": "Hello"}
@@ -70,17 +75,12 @@ class TestMessagesEndpoint:
             assert response.status_code == 503
             assert "not connected" in response.json()["detail"].lower()
 
-    def test_send_channel_message_requires_connection(self):
+    def test_send_channel_message_requires_connection(self, client):
         """Sending channel message when disconnected returns 503."""
-        from fastapi.testclient import TestClient
-
         with patch("app.dependencies.radio_manager") as mock_rm:
             mock_rm.is_connected = False
             mock_rm.meshcore = None
 
-            from app.main import app
-            client = TestClient(app)
-
             response = client.post(
                 "/api/messages/channel",
                 json={"channel_key": "0123456789ABCDEF0123456789ABCDEF", "text": "Hello"}
@@ -88,10 +88,8 @@ class TestMessagesEndpoint:
 
             assert response.status_code == 503
 
-    def test_send_direct_message_contact_not_found(self):
+    def test_send_direct_message_contact_not_found(self, client):
         """Sending to unknown contact returns 404."""
-        from fastapi.testclient import TestClient
-
         mock_mc = MagicMock()
         mock_mc.get_contact_by_key_prefix.return_value = None
 
@@ -101,9 +99,6 @@ class TestMessagesEndpoint:
             mock_rm.meshcore = mock_mc
             mock_get.return_value = None
 
-            from app.main import app
-            client = TestClient(app)
-
             response = client.post(
                 "/api/messages/direct",
                 json={"destination": "nonexistent", "text": "Hello"}
@@ -113,10 +108,136 @@ class TestMessagesEndpoint:
             assert "not found" in response.json()["detail"].lower()
 
 
+class TestTelemetryEndpoint:
+    """Test repeater telemetry requests."""
+
+    async def test_concurrent_requests_share_one_radio_exchange(self):
+        """Concurrent telemetry requests for the same repeater are coalesced."""
+        import asyncio
+        from app.models import Contact, TelemetryRequest, TelemetryResponse
+        from app.routers.contacts import _inflight_telemetry, request_telemetry
+
+        repeater = Contact(public_key="ab" * 32, name="Repeater", type=2)
+        telemetry = TelemetryResponse(
+            pubkey_prefix="abababababab", battery_volts=3.7, tx_queue_len=0,
+            noise_floor_dbm=-120, last_rssi_dbm=-90, last_snr_db=5.0,
+            packets_received=0, packets_sent=0, airtime_seconds=0,
+            rx_airtime_seconds=0, uptime_seconds=0, sent_flood=0, sent_direct=0,
+            recv_flood=0, recv_direct=0, flood_dups=0, direct_dups=0, full_events=0,
+        )
+
+        async def slow_fetch(mc, contact, password):
+            await asyncio.sleep(0.01)
+            return telemetry
+
+        with patch("app.routers.contacts.require_connected", return_value=MagicMock()), \
+             patch("app.routers.contacts.ContactRepository") as mock_repo, \
+             patch("app.routers.contacts._fetch_telemetry", side_effect=slow_fetch) as mock_fetch:
+            mock_repo.get_by_key_or_prefix = AsyncMock(return_value=repeater)
+
+            results = await asyncio.gather(
+                request_telemetry(repeater.public_key, TelemetryRequest()),
+                request_telemetry(repeater.public_key, TelemetryRequest()),
+            )
+
+            assert mock_fetch.call_count == 1
+            assert results[0] is results[1] is telemetry
+            assert not _inflight_telemetry
+
+            # A caller with a different password gets its own login and exchange
+            mock_fetch.reset_mock()
+            await asyncio.gather(
+                request_telemetry(repeater.public_key, TelemetryRequest(password="one")),
+                request_telemetry(repeater.public_key, TelemetryRequest(password="two")),
+            )
+            assert sorted(c.args[2] for c in mock_fetch.call_args_list) == ["one", "two"]
+
+    def test_telemetry_response_maps_radio_status_fields(self):
+        """Radio status fields map onto the response model, with mV -> V for battery."""
+        from app.models import TelemetryResponse
+
+        status = {"pubkey_pre": "abcdef123456", "bat": 3775, "nb_recv": 10, "full_evts": 2}
+
+        result = TelemetryResponse.model_validate(status)
+
+        assert result.pubkey_prefix == "abcdef123456"
+        assert result.battery_volts == 3.775
+        assert result.packets_received == 10
+        assert result.full_events == 2
+        assert result.uptime_seconds == 0  # Missing fields default to zero
+
+        # Serialized output validates back unchanged (no double battery conversion)
+        assert TelemetryResponse.model_validate(result.model_dump()) == result
+
+
+class TestRepeaterCommand:
+    """Test repeater CLI command sessions."""
+
+    def _mock_mc(self, *send_results):
+        mc = MagicMock()
+        mc.commands.send_cmd = AsyncMock(side_effect=[
+            MagicMock(type=result, payload={}) for result in send_results
+        ])
+        mc.wait_for_event = AsyncMock(return_value=None)  # No CLI response
+        return mc
+
+    async def test_fresh_session_skips_re_adding_repeater(self):
+        """Commands within the session window don't redo the add/remove dance."""
+        import time
+        from meshcore import EventType
+        from app.models import CommandRequest, Contact
+        from app.routers import contacts
+
+        repeater = Contact(public_key="cd" * 32, name="Repeater", type=2)
+        mc = self._mock_mc(EventType.OK)
+        contacts._repeater_sessions[repeater.public_key] = time.monotonic() + 60
+
+        try:
+            with patch("app.routers.contacts.require_connected", return_value=mc), \
+                 patch("app.routers.contacts.ContactRepository") as mock_repo, \
+                 patch("app.routers.contacts.radio_manager") as mock_rm, \
+                 patch("app.routers.contacts.ensure_repeater_on_radio", new_callable=AsyncMock) as mock_ensure:
+                mock_repo.get_by_key_or_prefix = AsyncMock(return_value=repeater)
+                mock_rm.get_contact_by_key_prefix.return_value = {"public_key": repeater.public_key}
+
+                await contacts.send_repeater_command(repeater.public_key, CommandRequest(command="ver"))
+
+                mock_ensure.assert_not_called()
+                mc.commands.send_cmd.assert_called_once()
+        finally:
+            contacts._repeater_sessions.clear()
+
+    async def test_failed_command_with_session_re_adds_and_retries(self):
+        """A command failing under a cached session re-adds the repeater and retries once."""
+        import time
+        from meshcore import EventType
+        from app.models import CommandRequest, Contact
+        from app.routers import contacts
+
+        repeater = Contact(public_key="ef" * 32, name="Repeater", type=2)
+        mc = self._mock_mc(EventType.ERROR, EventType.OK)
+        contacts._repeater_sessions[repeater.public_key] = time.monotonic() + 60
+
+        try:
+            with patch("app.routers.contacts.require_connected", return_value=mc), \
+                 patch("app.routers.contacts.ContactRepository") as mock_repo, \
+                 patch("app.routers.contacts.radio_manager") as mock_rm, \
+                 patch("app.routers.contacts.ensure_repeater_on_radio", new_callable=AsyncMock) as mock_ensure:
+                mock_repo.get_by_key_or_prefix = AsyncMock(return_value=repeater)
+                mock_rm.get_contact_by_key_prefix.return_value = {"public_key": repeater.public_key}
+
+                await contacts.send_repeater_command(repeater.public_key, CommandRequest(command="ver"))
+
+                mock_ensure.assert_called_once()
+                assert mc.commands.send_cmd.call_count == 2
+                assert repeater.public_key not in contacts._repeater_sessions
+        finally:
+            contacts._repeater_sessions.clear()
+
+
 class TestChannelsEndpoint:
     """Test channel-related endpoints."""
 
-    @pytest.mark.asyncio
     async def test_create_hashtag_channel_derives_key(self):
         """Creating hashtag channel derives key from name and stores in DB."""
         import hashlib
@@ -142,7 +263,6 @@ class TestChannelsEndpoint:
             assert result.key == expected_key_hex
             assert result.name == "#mychannel"
 
-    @pytest.mark.asyncio
     async def test_create_channel_with_explicit_key(self):
         """Creating channel with explicit key uses provided key."""
         from app.routers.channels import create_channel, CreateChannelRequest
@@ -166,29 +286,388 @@ class TestChannelsEndpoint:
             assert result.key == explicit_key.upper()
 
 
+class TestRadioConfigUpdate:
+    """Test PATCH /radio/config."""
+
+    def _make_mc(self) -> MagicMock:
+        mc = MagicMock()
+        mc.self_info = {
+            "public_key": "ab" * 32, "name": "node", "adv_lat": 0.0, "adv_lon": 0.0,
+            "tx_power": 20, "max_tx_power": 22,
+            "radio_freq": 910.525, "radio_bw": 62.5, "radio_sf": 7, "radio_cr": 5,
+        }
+        mc.commands.set_name = AsyncMock()
+        mc.commands.set_time = AsyncMock()
+        mc.commands.reboot = AsyncMock()
+        return mc
+
+    async def test_config_response_cached_until_self_info_replaced(self):
+        """GET reuses the built response until meshcore swaps in a new self_info dict."""
+        from app.routers import radio
+
+        mc = self._make_mc()
+
+        with patch("app.routers.radio.require_connected", return_value=mc):
+            first = await radio.get_radio_config()
+            second = await radio.get_radio_config()
+            assert second is first
+
+            # A SELF_INFO event replaces the dict
+            mc.self_info = {**mc.self_info, "name": "renamed"}
+            third = await radio.get_radio_config()
+
+        assert third is not first
+        assert third.name == "renamed"
+        assert third.radio.freq == 910.525
+
+    def test_clock_synced_once_per_connection(self, client):
+        """Repeated saves only sync the radio clock the first time."""
+        from app.routers import radio
+
+        mc = self._make_mc()
+        radio._time_synced_mc = None
+
+        with patch("app.routers.radio.require_connected", return_value=mc):
+            assert client.patch("/api/radio/config", json={"name": "a"}).status_code == 200
+            assert client.patch("/api/radio/config", json={"name": "b"}).status_code == 200
+
+        assert mc.commands.set_name.await_count == 2
+        mc.commands.set_time.assert_awaited_once()
+
+    def test_clock_resynced_after_reboot(self, client):
+        """A reboot forces the next save to sync the clock again."""
+        from app.routers import radio
+
+        mc = self._make_mc()
+        radio._time_synced_mc = None
+
+        with patch("app.routers.radio.require_connected", return_value=mc):
+            client.patch("/api/radio/config", json={"name": "a"})
+            client.post("/api/radio/reboot")
+            client.patch("/api/radio/config", json={"name": "a"})
+
+        assert mc.commands.set_time.await_count == 2
+
+
 class TestPacketsEndpoint:
     """Test packet decryption endpoints."""
 
-    def test_get_undecrypted_count(self):
+    def test_get_undecrypted_count(self, client):
         """Get undecrypted packet count returns correct value."""
-        from fastapi.testclient import TestClient
-
         with patch("app.routers.packets.RawPacketRepository") as mock_repo:
             mock_repo.get_undecrypted_count = AsyncMock(return_value=42)
 
-            from app.main import app
-            client = TestClient(app)
-
             response = client.get("/api/packets/undecrypted/count")
 
             assert response.status_code == 200
             assert response.json()["count"] == 42
 
+    def test_decrypt_rejects_malformed_channel_key(self, client):
+        """Keys that aren't hex, or don't decode to 16 bytes, are rejected before any work starts."""
+        cases = {
+            "AB" * 15: "must be 16 bytes",
+            "ZZ" * 16: "Invalid hex",
+            "ZZ" * 3: "Invalid hex",
+            "AB " * 10 + "ABCD": "must be 16 bytes",
+        }
+
+        for key, expected in cases.items():
+            response = client.post(
+                "/api/packets/decrypt/historical",
+                json={"key_type": "channel", "channel_key": key},
+            )
+            assert response.status_code == 200
+            assert response.json()["started"] is False
+            assert expected in response.json()["message"]
+
+    def test_decrypt_rejects_invalid_body_with_422(self, client):
+        """Bodies are validated straight from JSON but still fail like a normal FastAPI body."""
+        response = client.post(
+            "/api/packets/decrypt/historical", json={"channel_name": "#six77"}
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "key_type"]
+
+        response = client.post(
+            "/api/packets/decrypt/historical",
+            content=b"not json",
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 422
+
+        schema = client.app.openapi()["paths"]["/api/packets/decrypt/historical"]["post"]
+        body_schema = schema["requestBody"]["content"]["application/json"]["schema"]
+        assert "key_type" in body_schema["properties"]
+
+    async def test_decrypt_reruns_only_scan_new_packets(self):
+        """A key that has completed a pass only counts packets newer than its watermark."""
+        from app.routers import packets
+
+        request = packets.DecryptRequest(key_type="channel", channel_name="#six77")
+        key_hex = packets.derive_channel_key("#six77").hex().upper()
+
+        with (
+            patch.object(packets, "RawPacketRepository") as mock_repo,
+            patch.object(packets, "_run_historical_decryption", new_callable=AsyncMock) as mock_run,
+            patch.dict(packets._scanned_through, {key_hex: 500}, clear=True),
+            patch.object(packets, "_decrypt_task", None),
+        ):
+            mock_repo.get_undecrypted_count = AsyncMock(return_value=0)
+
+            result = await packets.decrypt_historical_packets(request)
+
+            assert result.started is False
+            mock_repo.get_undecrypted_count.assert_awaited_once_with(500)
+            mock_run.assert_not_called()
+
+    async def test_decrypt_refuses_while_task_running(self):
+        """A second request while a run is active doesn't start another."""
+        import asyncio
+
+        from app.routers import packets
+
+        request = packets.DecryptRequest(key_type="channel", channel_name="#other")
+        running = asyncio.get_running_loop().create_future()
+
+        with (
+            patch.object(packets, "RawPacketRepository") as mock_repo,
+            patch.object(packets, "_decrypt_task", running),
+            patch.object(packets, "_decrypt_progress", {"total": 10, "processed": 3, "decrypted": 0, "in_progress": True}),
+        ):
+            mock_repo.get_undecrypted_count = AsyncMock(return_value=10)
+
+            result = await packets.decrypt_historical_packets(request)
+
+        running.cancel()
+        assert result.started is False
+        assert "3/10" in result.message
+        mock_repo.get_undecrypted_count.assert_not_called()
+
+
+class TestHistoricalDecryption:
+    """Test the background historical decryption task."""
+
+    async def test_decrypts_matching_packets_across_chunks(self, six77_packet, six77_key):
+        """Only packets for the key are stored, and progress covers every packet."""
+        from app.routers import packets
+
+        channel_key = six77_key
+        # Filler GROUP_TEXT packets with a non-matching channel hash, spanning several chunks
+        filler = [
+            (i, bytes([0x15, 0x00, 0xFF]) + i.to_bytes(4, "little") + bytes(16), 1000 + i)
+            for i in range(1, packets.DECRYPT_CHUNK_SIZE * 2)
+        ]
+        rows = filler + [(999, six77_packet, 5000)]
+
+        with (
+            patch.object(packets, "RawPacketRepository") as mock_repo,
+            patch.object(packets, "create_messages_from_decrypted", new_callable=AsyncMock) as mock_create,
+        ):
+            mock_repo.get_undecrypted_count = AsyncMock(return_value=len(rows))
+
+            async def iter_undecrypted(batch_size, after_id=0):
+                for start in range(0, len(rows), batch_size):
+                    yield rows[start : start + batch_size]
+
+            mock_repo.iter_undecrypted = iter_undecrypted
+            mock_create.return_value = 1
+
+            try:
+                with patch.dict(packets._scanned_through, clear=True):
+                    await packets._run_historical_decryption(channel_key, channel_key.hex().upper())
+                    # A completed pass records how far this key has scanned
+                    assert packets._scanned_through[channel_key.hex().upper()] == 999
+            finally:
+                packets.shutdown_decrypt_pool()
+
+        # All decrypted packets are written in one batch
+        mock_create.assert_called_once()
+        channel_key_hex, batch = mock_create.call_args.args
+        assert channel_key_hex == channel_key.hex().upper()
+        assert len(batch) == 1
+        packet_id, result, received_at = batch[0]
+        assert packet_id == 999
+        assert result.sender == "Flightless🥝"
+        assert received_at == 5000
+
+        progress = await packets.get_decrypt_progress()
+        assert progress.total == len(rows)
+        assert progress.processed == len(rows)
+        assert progress.decrypted == 1
+        assert progress.in_progress is False
+
+    async def test_broken_pool_is_discarded(self, six77_packet):
+        """A pool whose worker died is shut down and replaced on the next run."""
+        from concurrent.futures import Executor
+        from concurrent.futures.process import BrokenProcessPool
+
+        from app.routers import packets
+
+        class BrokenPool(Executor):
+            shut_down = False
+
+            def submit(self, fn, /, *args, **kwargs):
+                raise BrokenProcessPool("worker died")
+
+            def shutdown(self, wait=True, *, cancel_futures=False):
+                self.shut_down = True
+
+        pool = BrokenPool()
+        rows = [(1, six77_packet, 5000)]
+
+        with (
+            patch.object(packets, "_decrypt_pool", pool),
+            patch.object(packets, "RawPacketRepository") as mock_repo,
+        ):
+            mock_repo.get_undecrypted_count = AsyncMock(return_value=len(rows))
+
+            async def iter_undecrypted(batch_size, after_id=0):
+                yield rows
+
+            mock_repo.iter_undecrypted = iter_undecrypted
+
+            with pytest.raises(BrokenProcessPool):
+                await packets._run_historical_decryption(bytes(16), "00" * 16)
+
+            assert pool.shut_down
+            assert packets._decrypt_pool is None
+
+    def test_failed_run_is_logged(self):
+        """Exceptions from the background decrypt task are logged by its done-callback."""
+        from app.routers import packets
+
+        task = MagicMock()
+        task.cancelled.return_value = False
+        task.exception.return_value = RuntimeError("boom")
+
+        with patch.object(packets, "logger") as mock_logger:
+            packets._log_decrypt_task_result(task)
+
+        mock_logger.error.assert_called_once()
+
+
+class TestRealtimeChannelIndex:
+    """Test the cached channel key index used for incoming GroupText packets."""
+
+    async def test_index_reloaded_only_after_channels_change(self):
+        """Channels are loaded once and reloaded after the channels table is invalidated."""
+        from app import packet_processor
+        from app.models import Channel
+        from app.snapshots import invalidate_snapshot
+
+        key_hex = "7ABA109EDCF304A84433CB71D0F3AB73"
+        channel = Channel(key=key_hex, name="#six77", is_hashtag=True, on_radio=False)
+
+        with (
+            patch.object(packet_processor, "_channel_index", None),
+            patch("app.packet_processor.ChannelRepository") as mock_repo,
+        ):
+            mock_repo.get_all = AsyncMock(return_value=[channel])
+
+            by_key, index = await packet_processor._get_channel_index()
+            await packet_processor._get_channel_index()
+            assert mock_repo.get_all.await_count == 1
+            assert by_key[bytes.fromhex(key_hex)] is channel
+            assert [p.key.hex().upper() for bucket in index.values() for p in bucket] == [key_hex]
+
+            invalidate_snapshot("channels")
+            await packet_processor._get_channel_index()
+            assert mock_repo.get_all.await_count == 2
+
+
+class TestBatchedDecryptedMessages:
+    """Test storing a batch of historically decrypted channel messages."""
+
+    async def test_batch_creates_messages_and_links_duplicates(self):
+        """New messages are created once; duplicate packets link to the existing message."""
+        import aiosqlite
+        from app.database import SCHEMA, db
+        from app.decoder import DecryptedGroupText
+        from app.packet_processor import create_messages_from_decrypted
+
+        conn = await aiosqlite.connect(":memory:")
+        conn.row_factory = aiosqlite.Row
+        await conn.executescript(SCHEMA)
+        for packet_id in (1, 2, 3):
+            await conn.execute(
+                "INSERT INTO raw_packets (id, timestamp, data) VALUES (?, ?, ?)",
+                (packet_id, 1000, bytes([packet_id])),
+            )
+        await conn.commit()
+
+        original_conn = db._connection
+        db._connection = conn
+
+        hello = DecryptedGroupText(timestamp=1700000000, flags=0, sender="Alice", message="hi", channel_hash="e6")
+        other = DecryptedGroupText(timestamp=1700000001, flags=0, sender=None, message="plain", channel_hash="e6")
+
+        try:
+            with patch("app.packet_processor.broadcast_event") as mock_broadcast:
+                # Packet 2 is the same message heard via another path
+                created = await create_messages_from_decrypted(
+                    "abcd", [(1, hello, 1000), (2, hello, 1001), (3, other, 1002)]
+                )
+
+            assert created == 2
+            assert mock_broadcast.call_count == 2
+
+            cursor = await conn.execute("SELECT id, text, conversation_key FROM messages ORDER BY id")
+            messages = await cursor.fetchall()
+            assert [m["text"] for m in messages] == ["Alice: hi", "plain"]
+            assert all(m["conversation_key"] == "ABCD" for m in messages)
+
+            cursor = await conn.execute("SELECT id, decrypted, message_id FROM raw_packets ORDER BY id")
+            links = [(r["id"], r["decrypted"], r["message_id"]) for r in await cursor.fetchall()]
+            assert links == [
+                (1, 1, messages[0]["id"]),
+                (2, 1, messages[0]["id"]),
+                (3, 1, messages[1]["id"]),
+            ]
+        finally:
+            db._connection = original_conn
+            await conn.close()
+
+
+class TestCreateAndTouchContact:
+    """Test storing a direct message together with the contact's activity."""
+
+    async def test_duplicate_message_still_touches_contact(self):
+        """A duplicate delivery isn't stored again but still counts as contact activity."""
+        import aiosqlite
+        from app.database import SCHEMA, db
+        from app.repository import MessageRepository
+
+        conn = await aiosqlite.connect(":memory:")
+        conn.row_factory = aiosqlite.Row
+        await conn.executescript(SCHEMA)
+        await conn.execute("INSERT INTO contacts (public_key) VALUES (?)", ("ab" * 32,))
+        await conn.commit()
+
+        original_conn = db._connection
+        db._connection = conn
+
+        try:
+            first = await MessageRepository.create_and_touch_contact(
+                "PRIV", "hi", 1000, "ab" * 32, sender_timestamp=1000, outgoing=True
+            )
+            duplicate = await MessageRepository.create_and_touch_contact(
+                "PRIV", "hi", 2000, "ab" * 32, sender_timestamp=1000, outgoing=True
+            )
+
+            assert first is not None
+            assert duplicate is None
+
+            cursor = await conn.execute("SELECT last_contacted, last_seen FROM contacts")
+            row = await cursor.fetchone()
+            assert (row["last_contacted"], row["last_seen"]) == (2000, 2000)
+        finally:
+            db._connection = original_conn
+            await conn.close()
+
 
 class TestRawPacketRepository:
     """Test raw packet storage with deduplication."""
 
-    @pytest.mark.asyncio
     async def test_create_returns_id_for_new_packet(self):
         """First insert of packet data returns a valid ID."""
         import aiosqlite
@@ -227,7 +706,6 @@ class TestRawPacketRepository:
             db._connection = original_conn
             await conn.close()
 
-    @pytest.mark.asyncio
     async def test_create_returns_none_for_duplicate_packet(self):
         """Second insert of same packet data returns None (duplicate)."""
         import aiosqlite
@@ -270,7 +748,6 @@ class TestRawPacketRepository:
             db._connection = original_conn
             await conn.close()
 
-    @pytest.mark.asyncio
     async def test_different_packets_both_stored(self):
         """Different packet data both get stored with unique IDs."""
         import aiosqlite
@@ -312,3 +789,34 @@ class TestRawPacketRepository:
         finally:
             db._connection = original_conn
             await conn.close()
+
+    async def test_iter_undecrypted_pages_past_rows_marked_mid_scan(self):
+        """Marking packets decrypted during iteration doesn't skip later packets."""
+        import aiosqlite
+        from app.repository import RawPacketRepository
+        from app.database import SCHEMA, db
+
+        conn = await aiosqlite.connect(":memory:")
+        conn.row_factory = aiosqlite.Row
+        await conn.executescript(SCHEMA)
+
+        original_conn = db._connection
+        db._connection = conn
+
+        try:
+            for i in range(7):
+                await RawPacketRepository.create(bytes([i]), 1000 + i)
+            # One packet was already decrypted before the scan
+            await conn.execute("UPDATE raw_packets SET decrypted = 1 WHERE id = 2")
+
+            seen = []
+            async for batch in RawPacketRepository.iter_undecrypted(batch_size=2):
+                assert len(batch) <= 2
+                seen.extend(packet_id for packet_id, _, _ in batch)
+                # Simulate the decryption task marking the batch as it goes
+                await RawPacketRepository.mark_many_decrypted([(pid, 1) for pid, _, _ in batch])
+
+            assert seen == [1, 3, 4, 5, 6, 7]
+        finally:
+            db._connection = original_conn
+            await conn.close()
@@ -6,6 +6,7 @@ which is critical for correctly interpreting mesh network messages.
 
 import hashlib
 import hmac
+import struct
 
 import pytest
 from Crypto.Cipher import AES
@@ -15,12 +16,50 @@ from app.decoder import (
     PacketInfo,
     PayloadType,
     RouteType,
+    build_channel_key_index,
     calculate_channel_hash,
     decrypt_group_text,
+    derive_channel_key,
     parse_packet,
+    prepare_channel_key,
+    try_decrypt_packet_with_channel_index,
     try_decrypt_packet_with_channel_key,
+    try_decrypt_packet_with_channel_key_prepared,
+    try_decrypt_packets_with_channel_key,
 )
 
+# Real advertisement packet from 'Flightless 🥝'
+ADVERT_PACKET = bytes.fromhex(
+    "1200AE92564C5C9884854F04F469BBB2BAB8871A078053AF6CF4AA2C014B18CE8A83"
+    "54B55C6934EAC9C9BD98A99788B1725379BB25863731ADAB605BCD62F0BA0E467483"
+    "E0A21E81C9279665D117B265B192890B8E0C2AE03E48DA5AA28C3EFB842EF656670B"
+    "915128D902B72DB5F8466C696768746C65737320F09FA59D"
+)
+
+
+def _create_encrypted_payload(channel_key: bytes, timestamp: int, flags: int, message: str) -> bytes:
+    """Helper to create a valid encrypted GROUP_TEXT payload."""
+    # Build plaintext: timestamp(4) + flags(1) + message + null terminator,
+    # zero-padded to a 16-byte boundary (a full block if already aligned)
+    message_bytes = message.encode("utf-8")
+    length = 4 + 1 + len(message_bytes) + 1
+    plaintext = bytearray(length + ((-length) % 16 or 16))
+    struct.pack_into("<IB", plaintext, 0, timestamp, flags)
+    plaintext[5 : 5 + len(message_bytes)] = message_bytes
+
+    # Encrypt with AES-128 ECB
+    cipher = AES.new(channel_key, AES.MODE_ECB)
+    ciphertext = cipher.encrypt(plaintext)
+
+    # Calculate MAC: HMAC-SHA256(channel_secret, ciphertext)[:2]
+    channel_secret = channel_key + bytes(16)
+    mac = hmac.new(channel_secret, ciphertext, hashlib.sha256).digest()[:2]
+
+    # Build payload: channel_hash(1) + mac(2) + ciphertext
+    channel_hash = hashlib.sha256(channel_key).digest()[0:1]
+
+    return channel_hash + mac + ciphertext
+
 
 class TestChannelKeyDerivation:
     """Test channel key derivation from hashtag names."""
@@ -33,6 +72,11 @@ class TestChannelKeyDerivation:
         # This matches the meshcore_py implementation
         assert len(expected_key) == 16
 
+    def test_derive_channel_key_matches_sha256_prefix(self):
+        """derive_channel_key matches the SHA256(name)[:16] derivation."""
+        assert derive_channel_key("#six77").hex() == "7aba109edcf304a84433cb71d0f3ab73"
+        assert derive_channel_key("#test") == hashlib.sha256(b"#test").digest()[:16]
+
     def test_channel_hash_calculation(self):
         """Channel hash is the first byte of SHA256(key) as hex."""
         key = bytes(16)  # All zeros
@@ -103,48 +147,22 @@ class TestPacketParsing:
 
         assert parse_packet(header) is None
 
+    def test_parse_unassigned_payload_type_returns_none(self):
+        """Payload types with no PayloadType member (0x0C-0x0E) are rejected."""
+        # FLOOD route, payload type 0x0C
+        assert parse_packet(bytes([(0x0C << 2) | 0x01, 0x00]) + b"data") is None
+
 
 class TestGroupTextDecryption:
     """Test GROUP_TEXT (channel message) decryption."""
 
-    def _create_encrypted_payload(
-        self, channel_key: bytes, timestamp: int, flags: int, message: str
-    ) -> bytes:
-        """Helper to create a valid encrypted GROUP_TEXT payload."""
-        # Build plaintext: timestamp(4) + flags(1) + message + null terminator
-        plaintext = (
-            timestamp.to_bytes(4, "little")
-            + bytes([flags])
-            + message.encode("utf-8")
-            + b"\x00"
-        )
-
-        # Pad to 16-byte boundary
-        pad_len = (16 - len(plaintext) % 16) % 16
-        if pad_len == 0:
-            pad_len = 16
-        plaintext += bytes(pad_len)
-
-        # Encrypt with AES-128 ECB
-        cipher = AES.new(channel_key, AES.MODE_ECB)
-        ciphertext = cipher.encrypt(plaintext)
-
-        # Calculate MAC: HMAC-SHA256(channel_secret, ciphertext)[:2]
-        channel_secret = channel_key + bytes(16)
-        mac = hmac.new(channel_secret, ciphertext, hashlib.sha256).digest()[:2]
-
-        # Build payload: channel_hash(1) + mac(2) + ciphertext
-        channel_hash = hashlib.sha256(channel_key).digest()[0:1]
-
-        return channel_hash + mac + ciphertext
-
     def test_decrypt_valid_message(self):
         """Decrypt a valid GROUP_TEXT message."""
         channel_key = hashlib.sha256(b"#testchannel").digest()[:16]
         timestamp = 1700000000
         message = "TestUser: Hello world"
 
-        payload = self._create_encrypted_payload(channel_key, timestamp, 0, message)
+        payload = _create_encrypted_payload(channel_key, timestamp, 0, message)
 
         result = decrypt_group_text(payload, channel_key)
 
@@ -158,7 +176,7 @@ class TestGroupTextDecryption:
         channel_key = hashlib.sha256(b"#test").digest()[:16]
         message = "Just a plain message"
 
-        payload = self._create_encrypted_payload(channel_key, 1234567890, 0, message)
+        payload = _create_encrypted_payload(channel_key, 1234567890, 0, message)
 
         result = decrypt_group_text(payload, channel_key)
 
@@ -166,12 +184,26 @@ class TestGroupTextDecryption:
         assert result.sender is None
         assert result.message == "Just a plain message"
 
+    @pytest.mark.parametrize(
+        "message",
+        ["[bot]: status ok", "a:b: split", ": no name", "x" * 50 + ": too long to be a name"],
+    )
+    def test_decrypt_text_that_is_not_a_sender_prefix(self, message):
+        """Text before ': ' that can't be a sender name is left in the message."""
+        channel_key = hashlib.sha256(b"#test").digest()[:16]
+        payload = _create_encrypted_payload(channel_key, 1234567890, 0, message)
+
+        result = decrypt_group_text(payload, channel_key)
+
+        assert result.sender is None
+        assert result.message == message
+
     def test_decrypt_with_wrong_key_fails(self):
         """Decryption with wrong key fails MAC verification."""
         correct_key = hashlib.sha256(b"#correct").digest()[:16]
         wrong_key = hashlib.sha256(b"#wrong").digest()[:16]
 
-        payload = self._create_encrypted_payload(correct_key, 1234567890, 0, "test")
+        payload = _create_encrypted_payload(correct_key, 1234567890, 0, "test")
 
         result = decrypt_group_text(payload, wrong_key)
 
@@ -180,7 +212,7 @@ class TestGroupTextDecryption:
     def test_decrypt_corrupted_mac_fails(self):
         """Corrupted MAC causes decryption to fail."""
         channel_key = hashlib.sha256(b"#test").digest()[:16]
-        payload = self._create_encrypted_payload(channel_key, 1234567890, 0, "test")
+        payload = _create_encrypted_payload(channel_key, 1234567890, 0, "test")
 
         # Corrupt the MAC (bytes 1-2)
         corrupted = payload[:1] + bytes([payload[1] ^ 0xFF, payload[2] ^ 0xFF]) + payload[3:]
@@ -189,6 +221,15 @@ class TestGroupTextDecryption:
 
         assert result is None
 
+    @pytest.mark.parametrize("mac_byte", [1, 2])
+    def test_decrypt_single_mac_byte_flip_fails(self, mac_byte):
+        """A one-bit error in either MAC byte is enough to reject the payload."""
+        channel_key = hashlib.sha256(b"#test").digest()[:16]
+        payload = bytearray(_create_encrypted_payload(channel_key, 1234567890, 0, "test"))
+        payload[mac_byte] ^= 0x01
+
+        assert decrypt_group_text(bytes(payload), channel_key) is None
+
 
 class TestTryDecryptPacket:
     """Test the full packet decryption pipeline."""
@@ -219,28 +260,67 @@ class TestTryDecryptPacket:
 
         assert result is None
 
+    def test_prepared_key_is_reusable_across_packets(self):
+        """A prepared key decrypts repeatedly without its HMAC state being consumed."""
+        channel_key = hashlib.sha256(b"#test").digest()[:16]
+        prepared = prepare_channel_key(channel_key)
+        packets = [
+            bytes([0x15, 0x00])
+            + _create_encrypted_payload(channel_key, 1700000000 + i, 0, f"A: msg {i}")
+            for i in range(3)
+        ]
+
+        results = [try_decrypt_packet_with_channel_key_prepared(p, prepared) for p in packets]
+
+        assert [r.message for r in results] == ["msg 0", "msg 1", "msg 2"]
+        assert prepared.channel_hash == hashlib.sha256(channel_key).digest()[0]
+        assert prepare_channel_key(channel_key) is prepared
+
+    def test_channel_index_only_tries_keys_with_matching_hash(self):
+        """The index picks the right key out of several and ignores unrelated hashes."""
+        channel_key = hashlib.sha256(b"#test").digest()[:16]
+        other_keys = [hashlib.sha256(f"#other{i}".encode()).digest()[:16] for i in range(5)]
+        packet = bytes([0x15, 0x00]) + _create_encrypted_payload(
+            channel_key, 1700000000, 0, "A: hi"
+        )
+
+        index = build_channel_key_index([*other_keys, channel_key])
+        prepared, result = try_decrypt_packet_with_channel_index(packet, index)
+
+        assert prepared.key == channel_key
+        assert result.message == "hi"
+        assert try_decrypt_packet_with_channel_index(packet, build_channel_key_index(other_keys)) is None
+
+    def test_batch_matches_single_packet_results(self):
+        """The batch helper's header prefilter agrees with decrypting each packet on its own."""
+        channel_key = hashlib.sha256(b"#test").digest()[:16]
+        payload = _create_encrypted_payload(channel_key, 1700000000, 0, "A: hi")
+        packets = [
+            bytes([0x15, 0x00]) + payload,  # FLOOD
+            bytes([0x14]) + b"\x01\x02\x03\x04" + bytes([0x01, 0xAA]) + payload,  # TRANSPORT_FLOOD with path
+            bytes([0x15, 0x00]) + bytes([payload[0] ^ 0xFF]) + payload[1:],  # other channel's hash
+            bytes([0x15, 0x05]) + payload[:3],  # path runs past the end
+            bytes([0x14, 0x00, 0x00]),  # truncated transport codes
+            ADVERT_PACKET,
+            b"",
+        ]
+
+        results = try_decrypt_packets_with_channel_key(packets, channel_key)
+
+        assert results == [try_decrypt_packet_with_channel_key(p, channel_key) for p in packets]
+        assert [r is not None for r in results] == [True, True, False, False, False, False, False]
+
 
 class TestRealWorldPackets:
     """Test with real captured packets to ensure decoder matches protocol."""
 
-    def test_decrypt_six77_channel_message(self):
+    def test_decrypt_six77_channel_message(self, six77_packet, six77_key):
         """Decrypt a real packet from #six77 channel."""
-        # Real packet captured from #six77 hashtag channel
-        packet_hex = (
-            "1500E69C7A89DD0AF6A2D69F5823B88F9720731E4B887C56932BF889255D8D926D"
-            "99195927144323A42DD8A158F878B518B8304DF55E80501C7D02A9FFD578D35182"
-            "83156BBA257BF8413E80A237393B2E4149BBBC864371140A9BBC4E23EB9BF203EF"
-            "0D029214B3E3AAC3C0295690ACDB89A28619E7E5F22C83E16073AD679D25FA904D"
-            "07E5ACF1DB5A7C77D7E1719FB9AE5BF55541EE0D7F59ED890E12CF0FEED6700818"
-        )
-        packet = bytes.fromhex(packet_hex)
-
         # Verify key derivation: SHA256("#six77")[:16]
-        channel_key = hashlib.sha256(b"#six77").digest()[:16]
-        assert channel_key.hex() == "7aba109edcf304a84433cb71d0f3ab73"
+        assert six77_key.hex() == "7aba109edcf304a84433cb71d0f3ab73"
 
         # Decrypt the packet
-        result = try_decrypt_packet_with_channel_key(packet, channel_key)
+        result = try_decrypt_packet_with_channel_key(six77_packet, six77_key)
 
         assert result is not None
         assert result.sender == "Flightless🥝"
@@ -256,16 +336,7 @@ class TestAdvertisementParsing:
         """Parse a real advertisement packet from 'Flightless 🥝'."""
         from app.decoder import try_parse_advertisement
 
-        # Real advertisement packet
-        packet_hex = (
-            "1200AE92564C5C9884854F04F469BBB2BAB8871A078053AF6CF4AA2C014B18CE8A83"
-            "54B55C6934EAC9C9BD98A99788B1725379BB25863731ADAB605BCD62F0BA0E467483"
-            "E0A21E81C9279665D117B265B192890B8E0C2AE03E48DA5AA28C3EFB842EF656670B"
-            "915128D902B72DB5F8466C696768746C65737320F09FA59D"
-        )
-        packet = bytes.fromhex(packet_hex)
-
-        result = try_parse_advertisement(packet)
+        result = try_parse_advertisement(ADVERT_PACKET)
 
         assert result is not None
         # Public key is the first 32 bytes of payload
@@ -277,16 +348,8 @@ class TestAdvertisementParsing:
         """Advertisement parsing extracts the public key correctly."""
         from app.decoder import parse_packet, PayloadType
 
-        packet_hex = (
-            "1200AE92564C5C9884854F04F469BBB2BAB8871A078053AF6CF4AA2C014B18CE8A83"
-            "54B55C6934EAC9C9BD98A99788B1725379BB25863731ADAB605BCD62F0BA0E467483"
-            "E0A21E81C9279665D117B265B192890B8E0C2AE03E48DA5AA28C3EFB842EF656670B"
-            "915128D902B72DB5F8466C696768746C65737320F09FA59D"
-        )
-        packet = bytes.fromhex(packet_hex)
-
         # Verify packet is recognized as ADVERT type
-        info = parse_packet(packet)
+        info = parse_packet(ADVERT_PACKET)
         assert info is not None
         assert info.payload_type == PayloadType.ADVERT
 
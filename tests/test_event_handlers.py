@@ -10,6 +10,7 @@ from unittest.mock import AsyncMock, patch
 import pytest
 
 from app.event_handlers import (
+    _ack_expiry_heap,
     _cleanup_expired_acks,
     _pending_acks,
     track_pending_ack,
@@ -26,10 +27,12 @@ from app.packet_processor import (
 def clear_pending_state():
     """Clear pending ACKs and repeats before each test."""
     _pending_acks.clear()
+    _ack_expiry_heap.clear()
     _pending_repeats.clear()
     _pending_repeat_expiry.clear()
     yield
     _pending_acks.clear()
+    _ack_expiry_heap.clear()
     _pending_repeats.clear()
     _pending_repeat_expiry.clear()
 
@@ -45,7 +48,7 @@ class TestAckTracking:
         msg_id, created_at, timeout = _pending_acks["abc123"]
         assert msg_id == 42
         assert timeout == 5000
-        assert created_at <= time.time()
+        assert created_at <= time.monotonic_ns()
 
     def test_multiple_acks_tracked_independently(self):
         """Multiple pending ACKs can be tracked simultaneously."""
@@ -61,8 +64,9 @@ class TestAckTracking:
     def test_cleanup_removes_expired_acks(self):
         """Expired ACKs are removed during cleanup."""
         # Add an ACK that's "expired" (created in the past with short timeout)
-        _pending_acks["expired"] = (1, time.time() - 100, 1000)  # Created 100s ago, 1s timeout
-        _pending_acks["valid"] = (2, time.time(), 60000)  # Created now, 60s timeout
+        with patch("app.event_handlers.time.monotonic_ns", return_value=time.monotonic_ns() - 100 * 10**9):
+            track_pending_ack("expired", message_id=1, timeout_ms=1000)  # Created 100s ago, 1s timeout
+        track_pending_ack("valid", message_id=2, timeout_ms=60000)  # Created now, 60s timeout
 
         _cleanup_expired_acks()
 
@@ -73,12 +77,23 @@ class TestAckTracking:
         """Cleanup uses 2x timeout as buffer before expiring."""
         # ACK created 5 seconds ago with 10 second timeout
         # 2x buffer = 20 seconds, so should NOT be expired yet
-        _pending_acks["recent"] = (1, time.time() - 5, 10000)
+        with patch("app.event_handlers.time.monotonic_ns", return_value=time.monotonic_ns() - 5 * 10**9):
+            track_pending_ack("recent", message_id=1, timeout_ms=10000)
 
         _cleanup_expired_acks()
 
         assert "recent" in _pending_acks
 
+    def test_cleanup_keeps_re_tracked_ack(self):
+        """An ACK code tracked again isn't removed when its earlier entry expires."""
+        with patch("app.event_handlers.time.monotonic_ns", return_value=time.monotonic_ns() - 100 * 10**9):
+            track_pending_ack("reused", message_id=1, timeout_ms=1000)
+        track_pending_ack("reused", message_id=2, timeout_ms=60000)
+
+        _cleanup_expired_acks()
+
+        assert _pending_acks["reused"][0] == 2
+
 
 class TestRepeatTracking:
     """Test repeat tracking for channel/flood messages."""
@@ -89,7 +104,7 @@ class TestRepeatTracking:
         track_pending_repeat(channel_key=channel_key, text="Hello", timestamp=1700000000, message_id=99)
 
         # Key is (channel_key, text_hash, timestamp)
-        text_hash = str(hash("Hello"))
+        text_hash = hash("Hello")
         key = (channel_key, text_hash, 1700000000)
 
         assert key in _pending_repeats
@@ -113,7 +128,7 @@ class TestRepeatTracking:
     def test_cleanup_removes_old_repeats(self):
         """Expired repeats are removed during cleanup."""
         channel_key = "CCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCC"
-        text_hash = str(hash("test"))
+        text_hash = hash("test")
         old_key = (channel_key, text_hash, 1000)
         new_key = (channel_key, text_hash, 2000)
 
@@ -129,71 +144,83 @@ class TestRepeatTracking:
         assert new_key in _pending_repeats
 
 
+class FakeMessageRepository:
+    """Stand-in for MessageRepository that records ACK count increments."""
+
+    def __init__(self):
+        self.acked: list[int] = []
+
+    async def increment_ack_count(self, message_id: int) -> int:
+        self.acked.append(message_id)
+        return self.acked.count(message_id)
+
+
+@pytest.fixture
+def fake_repo(monkeypatch):
+    """Replace the event handlers' MessageRepository with a FakeMessageRepository."""
+    repo = FakeMessageRepository()
+    monkeypatch.setattr("app.event_handlers.MessageRepository", repo)
+    return repo
+
+
+@pytest.fixture
+def broadcasts(monkeypatch):
+    """Capture (event_type, data) pairs passed to the event handlers' broadcast_event."""
+    sent: list[tuple[str, dict]] = []
+    monkeypatch.setattr("app.event_handlers.broadcast_event", lambda event_type, data: sent.append((event_type, data)))
+    return sent
+
+
 class TestAckEventHandler:
     """Test the on_ack event handler."""
 
-    @pytest.mark.asyncio
-    async def test_ack_matches_pending_message(self):
+    async def test_ack_matches_pending_message(self, fake_repo, broadcasts):
         """Matching ACK code updates message and broadcasts."""
         from app.event_handlers import on_ack
 
         # Setup pending ACK
         track_pending_ack("deadbeef", message_id=123, timeout_ms=10000)
 
-        # Mock dependencies
-        with patch("app.event_handlers.MessageRepository") as mock_repo, \
-             patch("app.event_handlers.broadcast_event") as mock_broadcast:
-            mock_repo.increment_ack_count = AsyncMock(return_value=1)
-
-            # Create mock event
-            class MockEvent:
-                payload = {"code": "deadbeef"}
+        # Create mock event
+        class MockEvent:
+            payload = {"code": "deadbeef"}
 
-            await on_ack(MockEvent())
+        await on_ack(MockEvent())
 
-            # Verify ack count incremented
-            mock_repo.increment_ack_count.assert_called_once_with(123)
+        # Verify ack count incremented
+        assert fake_repo.acked == [123]
 
-            # Verify broadcast sent with ack_count
-            mock_broadcast.assert_called_once_with("message_acked", {"message_id": 123, "ack_count": 1})
+        # Verify broadcast sent with ack_count
+        assert broadcasts == [("message_acked", {"message_id": 123, "ack_count": 1})]
 
-            # Verify pending ACK removed
-            assert "deadbeef" not in _pending_acks
+        # Verify pending ACK removed
+        assert "deadbeef" not in _pending_acks
 
-    @pytest.mark.asyncio
-    async def test_ack_no_match_does_nothing(self):
+    async def test_ack_no_match_does_nothing(self, fake_repo, broadcasts):
         """Non-matching ACK code is ignored."""
         from app.event_handlers import on_ack
 
         track_pending_ack("expected", message_id=1, timeout_ms=10000)
 
-        with patch("app.event_handlers.MessageRepository") as mock_repo, \
-             patch("app.event_handlers.broadcast_event") as mock_broadcast:
-            mock_repo.increment_ack_count = AsyncMock()
+        class MockEvent:
+            payload = {"code": "different"}
 
-            class MockEvent:
-                payload = {"code": "different"}
-
-            await on_ack(MockEvent())
+        await on_ack(MockEvent())
 
-            mock_repo.increment_ack_count.assert_not_called()
-            mock_broadcast.assert_not_called()
-            assert "expected" in _pending_acks
+        assert fake_repo.acked == []
+        assert broadcasts == []
+        assert "expected" in _pending_acks
 
-    @pytest.mark.asyncio
-    async def test_ack_empty_code_ignored(self):
+    async def test_ack_empty_code_ignored(self, fake_repo):
         """ACK with empty code is ignored."""
         from app.event_handlers import on_ack
 
-        with patch("app.event_handlers.MessageRepository") as mock_repo:
-            mock_repo.increment_ack_count = AsyncMock()
-
-            class MockEvent:
-                payload = {"code": ""}
+        class MockEvent:
+            payload = {"code": ""}
 
-            await on_ack(MockEvent())
+        await on_ack(MockEvent())
 
-            mock_repo.increment_ack_count.assert_not_called()
+        assert fake_repo.acked == []
 
 
 class TestContactMessageCLIFiltering:
@@ -204,7 +231,6 @@ class TestContactMessageCLIFiltering:
     persist/broadcast it via the normal message handler.
     """
 
-    @pytest.mark.asyncio
     async def test_cli_response_skipped_not_stored(self):
         """CLI responses (txt_type=1) are not stored in database."""
         from app.event_handlers import on_contact_message
@@ -230,7 +256,6 @@ class TestContactMessageCLIFiltering:
             # Should NOT update contact last_contacted
             mock_contact_repo.update_last_contacted.assert_not_called()
 
-    @pytest.mark.asyncio
     async def test_normal_message_still_processed(self):
         """Normal messages (txt_type=0) are still processed normally."""
         from app.event_handlers import on_contact_message
@@ -257,7 +282,6 @@ class TestContactMessageCLIFiltering:
             # SHOULD broadcast via WebSocket
             mock_broadcast.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_missing_txt_type_defaults_to_normal(self):
         """Messages without txt_type field are treated as normal (not filtered)."""
         from app.event_handlers import on_contact_message
@@ -0,0 +1,48 @@
+"""Tests for the radio manager's contact lookups."""
+
+from unittest.mock import MagicMock
+
+from app.radio import RadioManager
+
+
+def _manager_with_contacts(contacts: dict) -> RadioManager:
+    mc = MagicMock()
+    mc.contacts = contacts
+    manager = RadioManager()
+    manager._meshcore = mc
+    return manager
+
+
+class TestContactPrefixLookup:
+    """Test prefix lookups against the meshcore contact cache."""
+
+    def test_finds_contact_by_12_char_prefix(self):
+        """Standard 12-char prefixes resolve case-insensitively via the index."""
+        contact = {"public_key": "aabbccddeeff" + "00" * 26}
+        manager = _manager_with_contacts({contact["public_key"]: contact})
+
+        assert manager.get_contact_by_key_prefix("AABBCCDDEEFF") is contact
+        assert manager.get_contact_by_key_prefix("112233445566") is None
+
+    def test_index_picks_up_new_contacts(self):
+        """Contacts added to the meshcore cache after a lookup are found."""
+        contacts: dict = {}
+        manager = _manager_with_contacts(contacts)
+        assert manager.get_contact_by_key_prefix("aabbccddeeff") is None
+
+        contact = {"public_key": "aabbccddeeff" + "00" * 26}
+        contacts[contact["public_key"]] = contact
+
+        assert manager.get_contact_by_key_prefix("aabbccddeeff") is contact
+
+    def test_other_prefix_lengths_use_meshcore_scan(self):
+        """Non-standard prefix lengths fall back to meshcore's own lookup."""
+        manager = _manager_with_contacts({})
+        manager._meshcore.get_contact_by_key_prefix.return_value = {"public_key": "abcd"}
+
+        assert manager.get_contact_by_key_prefix("abcd") == {"public_key": "abcd"}
+        manager._meshcore.get_contact_by_key_prefix.assert_called_once_with("abcd")
+
+    def test_returns_none_when_disconnected(self):
+        """No meshcore instance means no contacts."""
+        assert RadioManager().get_contact_by_key_prefix("aabbccddeeff") is None
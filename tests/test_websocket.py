@@ -0,0 +1,270 @@
+"""Tests for the WebSocket manager broadcast path."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from app.websocket import WebSocketManager
+
+
+def _make_client(fail: bool = False) -> MagicMock:
+    """Create a mock WebSocket whose send_text succeeds or raises."""
+    client = MagicMock()
+    client.accept = AsyncMock()
+    client.send_text = AsyncMock(side_effect=RuntimeError("closed") if fail else None)
+    return client
+
+
+class TestBroadcast:
+    """Test broadcasting events to connected clients."""
+
+    async def test_broadcast_sends_same_frame_to_all_clients(self):
+        """Every connected client receives the serialized event."""
+        manager = WebSocketManager()
+        clients = [_make_client(), _make_client()]
+        for client in clients:
+            await manager.connect(client)
+
+        await manager.broadcast("message", {"id": 1})
+
+        for client in clients:
+            client.send_text.assert_awaited_once()
+            frame = client.send_text.call_args.args[0]
+            assert json.loads(frame) == {"type": "message", "data": {"id": 1}}
+
+    async def test_broadcast_drops_failed_clients(self):
+        """Clients whose send fails are removed; healthy ones are kept."""
+        manager = WebSocketManager()
+        healthy = _make_client()
+        dead = _make_client(fail=True)
+        await manager.connect(healthy)
+        await manager.connect(dead)
+
+        await manager.broadcast("message", {"id": 1})
+
+        assert healthy in manager.active_connections
+        assert dead not in manager.active_connections
+
+    async def test_broadcast_sends_concurrently(self):
+        """A slow client doesn't delay delivery to the others."""
+        manager = WebSocketManager()
+        release = asyncio.Event()
+
+        async def slow_send(_frame):
+            await release.wait()
+
+        slow = _make_client()
+        slow.send_text = AsyncMock(side_effect=slow_send)
+        fast = _make_client()
+        await manager.connect(slow)
+        await manager.connect(fast)
+
+        task = asyncio.create_task(manager.broadcast("message", {"id": 1}))
+        # Let the broadcast start its sends while the slow client is still blocked
+        for _ in range(5):
+            await asyncio.sleep(0)
+        fast.send_text.assert_awaited_once()
+
+        release.set()
+        await task
+
+
+class TestSnapshotFrames:
+    """Test cached initial-state frames for new clients."""
+
+    async def test_frame_is_reused_until_invalidated(self):
+        """The loader only runs again after the snapshot is invalidated."""
+        from app.models import Channel
+        from app.snapshots import invalidate_snapshot
+        from app.websocket import get_snapshot_frame
+
+        channel = Channel(key="AA" * 16, name="#test", is_hashtag=True, on_radio=False)
+        load = AsyncMock(return_value=[channel])
+        invalidate_snapshot("channels")
+
+        first = await get_snapshot_frame("channels", load)
+        second = await get_snapshot_frame("channels", load)
+
+        assert first is second
+        assert load.await_count == 1
+        assert json.loads(first) == {"type": "channels", "data": [channel.model_dump()]}
+
+        invalidate_snapshot("channels")
+        await get_snapshot_frame("channels", load)
+        assert load.await_count == 2
+
+    async def test_frame_not_cached_if_invalidated_while_loading(self):
+        """A write that lands during the load keeps the stale frame out of the cache."""
+        from app.snapshots import invalidate_snapshot
+        from app.websocket import get_snapshot_frame
+
+        invalidate_snapshot("contacts")
+
+        async def load_racing_a_write():
+            invalidate_snapshot("contacts")
+            return []
+
+        await get_snapshot_frame("contacts", load_racing_a_write)
+
+        load = AsyncMock(return_value=[])
+        await get_snapshot_frame("contacts", load)
+        load.assert_awaited_once()
+
+
+class TestWebSocketEndpoint:
+    """Test the /api/ws endpoint's initial state and keepalive."""
+
+    def test_initial_state_and_pong(self, client):
+        """A new client gets health, contacts and channels, and pongs on ping."""
+        from unittest.mock import patch
+
+        from app.snapshots import invalidate_snapshot
+
+        invalidate_snapshot("contacts")
+        invalidate_snapshot("channels")
+
+        with (
+            patch("app.routers.ws.radio_manager") as mock_rm,
+            patch("app.routers.ws.ContactRepository") as mock_contacts,
+            patch("app.routers.ws.ChannelRepository") as mock_channels,
+        ):
+            mock_rm.is_connected = True
+            mock_rm.port = "/dev/ttyUSB0"
+            mock_contacts.get_all = AsyncMock(return_value=[])
+            mock_channels.get_all = AsyncMock(return_value=[])
+
+            with client.websocket_connect("/api/ws") as ws:
+                assert ws.receive_json() == {
+                    "type": "health",
+                    "data": {"status": "ok", "radio_connected": True, "serial_port": "/dev/ttyUSB0"},
+                }
+                assert ws.receive_json() == {"type": "contacts", "data": []}
+                assert ws.receive_json() == {"type": "channels", "data": []}
+
+                ws.send_text("ping")
+                assert ws.receive_json() == {"type": "pong"}
+
+        invalidate_snapshot("contacts")
+        invalidate_snapshot("channels")
+
+
+class TestBroadcastWorker:
+    """Test the queued broadcast worker."""
+
+    async def test_events_sent_in_order_and_health_coalesced(self):
+        """Queued events go out in order; a burst of health changes sends only the latest."""
+        from unittest.mock import patch
+
+        from app import websocket
+
+        sent = []
+
+        async def record(event_type, data):
+            sent.append((event_type, data))
+
+        with (
+            patch.object(websocket.ws_manager, "broadcast", side_effect=record),
+            patch.object(websocket.ws_manager, "active_connections", {object()}),
+        ):
+            websocket.start_broadcast_worker()
+            try:
+                websocket.broadcast_event("message", {"id": 1})
+                websocket.broadcast_health(False, None)
+                websocket.broadcast_health(True, "/dev/ttyUSB0")
+                websocket.broadcast_event("message", {"id": 2})
+
+                for _ in range(10):
+                    await asyncio.sleep(0)
+            finally:
+                await websocket.stop_broadcast_worker()
+
+        assert sent == [
+            ("message", {"id": 1}),
+            ("health", {"status": "ok", "radio_connected": True, "serial_port": "/dev/ttyUSB0"}),
+            ("message", {"id": 2}),
+        ]
+
+    async def test_health_sent_after_restart_with_marker_pending(self):
+        """A health marker dropped by a stop doesn't suppress health after a restart."""
+        from unittest.mock import patch
+
+        from app import websocket
+
+        sent = []
+
+        async def record(event_type, data):
+            sent.append((event_type, data))
+
+        with (
+            patch.object(websocket.ws_manager, "broadcast", side_effect=record),
+            patch.object(websocket.ws_manager, "active_connections", {object()}),
+        ):
+            websocket.start_broadcast_worker()
+            try:
+                # Queued but not yet sent when the worker is stopped
+                websocket.broadcast_health(False, None)
+            finally:
+                await websocket.stop_broadcast_worker()
+
+            websocket.start_broadcast_worker()
+            try:
+                websocket.broadcast_health(True, "/dev/ttyUSB0")
+
+                for _ in range(10):
+                    await asyncio.sleep(0)
+            finally:
+                await websocket.stop_broadcast_worker()
+
+        assert sent == [
+            ("health", {"status": "ok", "radio_connected": True, "serial_port": "/dev/ttyUSB0"}),
+        ]
+
+    async def test_full_queue_drops_only_droppable_events(self):
+        """When the queue is full, raw packets are dropped but other events still go out."""
+        from unittest.mock import patch
+
+        from app import websocket
+
+        sent = []
+
+        async def record(event_type, data):
+            sent.append((event_type, data))
+
+        with (
+            patch.object(websocket.ws_manager, "broadcast", side_effect=record),
+            patch.object(websocket.ws_manager, "active_connections", {object()}),
+            patch.object(websocket, "BROADCAST_QUEUE_SIZE", 1),
+        ):
+            websocket.start_broadcast_worker()
+            try:
+                websocket.broadcast_event("raw_packet", {"id": 1})
+                websocket.broadcast_event("raw_packet", {"id": 2})  # queue full: dropped
+                websocket.broadcast_event("message", {"id": 3})  # queue full: sent directly
+
+                for _ in range(10):
+                    await asyncio.sleep(0)
+            finally:
+                await websocket.stop_broadcast_worker()
+
+        assert sorted(sent, key=lambda e: e[1]["id"]) == [
+            ("raw_packet", {"id": 1}),
+            ("message", {"id": 3}),
+        ]
+
+    async def test_helpers_skip_when_no_clients(self):
+        """With no clients connected, nothing is queued or scheduled."""
+        from unittest.mock import patch
+
+        from app import websocket
+
+        with (
+            patch.object(websocket.ws_manager, "active_connections", set()),
+            patch.object(websocket, "_enqueue_broadcast") as mock_enqueue,
+            patch("app.websocket.asyncio.create_task") as mock_create_task,
+        ):
+            websocket.broadcast_event("message", {"id": 1})
+            websocket.broadcast_error("oops")
+            websocket.broadcast_health(True, None)
+
+        mock_enqueue.assert_not_called()
+        mock_create_task.assert_not_called()